@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+HTML 解析器基準測試：比較 alt_engine 各解析後端 (lxml / selectolax / html.parser) 掃描 <img> 的時間與記憶體峰值，
+並以 BeautifulSoup 建立整棵文件樹的舊作法作為參考。
+
+測試資料為 Testing Webpage 中的網頁，以及自動產生、模擬 CMS 匯出的大型網頁。
+每個項目都在新的 Python 行程中量測，記憶體峰值為掃描期間相對於掃描前增加的量。
+未安裝的解析器會顯示為略過。selectolax 無法串流解析，超過 HTML_MMAP_THRESHOLD 的檔案實際上會改用其他解析器。
+
+用法：
+    python Benchmarks/bench_html_parsers.py [--repeat 3] [--sizes 1,5] [--json result.json] [--no-reference]
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_DIR = os.path.join(BENCH_DIR, os.pardir, "Codes")
+FIXTURES_DIR = os.path.join(BENCH_DIR, os.pardir, "Testing Webpage")
+
+# (名稱, 事先匯入的程式碼, 掃描一次並回傳 <img> 數量的程式碼, 是否為參考值)
+TARGETS = [
+    ("lxml", "import lxml.etree",
+     "len(alt_engine.scan_img_tags(path, backend='lxml'))", False),
+    ("selectolax", "import selectolax.lexbor",
+     "len(alt_engine.scan_img_tags(path, backend='selectolax'))", False),
+    ("html.parser", "import html.parser",
+     "len(alt_engine.scan_img_tags(path, backend='html.parser'))", False),
+    # 參考值：改為串流掃描前，每個檔案都建立一棵完整的 BeautifulSoup 文件樹
+    ("(參考) bs4 + html.parser", "from bs4 import BeautifulSoup",
+     "len(BeautifulSoup(open(path, encoding='utf-8'), 'html.parser').find_all('img'))", True),
+    ("(參考) bs4 + lxml", "from bs4 import BeautifulSoup; import lxml",
+     "len(BeautifulSoup(open(path, encoding='utf-8'), 'lxml').find_all('img'))", True),
+]
+
+MEASURE_SCRIPT = """
+import sys, time, json
+sys.path.insert(0, '.')
+import alt_engine
+{setup}
+try:
+    import resource
+    def peak_bytes():
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+except ImportError: # Windows 沒有 resource 模組，只能量測 Python 物件的配置
+    import tracemalloc
+    tracemalloc.start()
+    peak_bytes = lambda: tracemalloc.get_traced_memory()[1]
+path = {path!r}
+baseline = peak_bytes()
+times = []
+for _ in range({repeat}):
+    start = time.perf_counter()
+    count = {code}
+    times.append(time.perf_counter() - start)
+print(json.dumps({{"times": times, "peak_bytes": peak_bytes() - baseline, "images": count}}))
+"""
+
+# 模擬 CMS 匯出頁面的區塊：巢狀標記、實體字元、註解與行內 script
+SYNTHETIC_BLOCK = """<div class="article-card" data-id="{i}">
+  <h2 class="article-title"><a href="/news/{i}.html">最新消息 {i} &amp; 活動公告</a></h2>
+  <p class="meta"><span>2025-05-23</span> | <span>教務處</span></p>
+  <p>本校 {i} 學年度活動資訊，詳細內容請參考附件。&nbsp;<strong>報名截止</strong>前請完成手續。</p>
+  <img src="images/photo_{i}.jpg" class="thumb" width="320" height="240">
+  <!-- card {i} end -->
+</div>
+"""
+SYNTHETIC_SCRIPT = """<script>window.dataLayer = window.dataLayer || []; dataLayer.push({{"card": {i}, "html": "<img src=x>"}});</script>
+"""
+
+
+def make_synthetic_page(path, size_mb):
+    """產生約 size_mb MB 的大型網頁，每個區塊有一張缺少 alt 的圖片，並穿插 script。"""
+    target = size_mb * 1024 * 1024
+    written = 0
+    i = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        header = "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Synthetic</title></head><body>\n"
+        f.write(header)
+        written += len(header.encode('utf-8'))
+        while written < target:
+            block = SYNTHETIC_BLOCK.format(i=i)
+            if i % 50 == 0:
+                block += SYNTHETIC_SCRIPT.format(i=i)
+            f.write(block)
+            written += len(block.encode('utf-8'))
+            i += 1
+        f.write("</body></html>\n")
+
+
+def measure(setup, code, path, repeat):
+    """在新的行程中掃描 repeat 次，回傳 (每次秒數, 記憶體峰值增加量, 圖片數)；失敗時回傳 None。"""
+    script = MEASURE_SCRIPT.format(setup=setup, code=code, path=path, repeat=repeat)
+    proc = subprocess.run([sys.executable, "-c", script], cwd=CODES_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result["times"], result["peak_bytes"], result["images"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="比較各 HTML 解析後端的掃描時間與記憶體峰值")
+    parser.add_argument("--repeat", type=int, default=3, help="每個項目重複掃描的次數 (預設 3)")
+    parser.add_argument("--sizes", default="1,5", help="自動產生的大型網頁大小 (MB)，以逗號分隔 (預設 1,5)")
+    parser.add_argument("--json", help="將結果輸出為 JSON 檔")
+    parser.add_argument("--no-reference", action="store_true", help="不量測 BeautifulSoup 參考值 (大型網頁上很慢)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, CODES_DIR)
+    import alt_engine
+    available = alt_engine.available_html_backends()
+    print(f"可用的解析器：{', '.join(available)} (自動選擇：{alt_engine.resolve_html_backend('auto')})")
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fixtures = sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+        for size_mb in [float(size) for size in args.sizes.split(",") if size.strip()]:
+            path = os.path.join(temp_dir, f"synthetic_{size_mb:g}MB.html")
+            make_synthetic_page(path, size_mb)
+            fixtures.append(path)
+
+        for path in fixtures:
+            size_kb = os.path.getsize(path) / 1024
+            print(f"\n{os.path.basename(path)} ({size_kb:,.0f} KB)")
+            print(f"  {'解析器':<26}{'中位數 (ms)':>12}{'最小值 (ms)':>12}{'記憶體峰值 (MB)':>16}{'<img> 數':>10}")
+            for name, setup, code, is_reference in TARGETS:
+                if is_reference and args.no_reference:
+                    continue
+                if not is_reference and name not in available:
+                    print(f"  {name:<26}{'略過 (未安裝)':>20}")
+                    results.append({"file": os.path.basename(path), "backend": name, "skipped": True})
+                    continue
+                run = measure(setup, code, path, args.repeat)
+                if run is None:
+                    print(f"  {name:<26}{'略過 (缺少相依套件)':>24}")
+                    results.append({"file": os.path.basename(path), "backend": name, "skipped": True})
+                    continue
+                times, peak_bytes, images = run
+                times_ms = [elapsed * 1000 for elapsed in times]
+                print(f"  {name:<26}{statistics.median(times_ms):>12.1f}{min(times_ms):>12.1f}"
+                      f"{peak_bytes / 1024 / 1024:>16.1f}{images:>10}")
+                results.append({
+                    "file": os.path.basename(path),
+                    "file_bytes": os.path.getsize(path),
+                    "backend": name,
+                    "median_ms": statistics.median(times_ms),
+                    "min_ms": min(times_ms),
+                    "peak_bytes": peak_bytes,
+                    "images": images,
+                })
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"python": sys.version, "repeat": args.repeat, "available": available, "results": results},
+                      f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+匯入時間基準測試：量測各程式模組在全新 Python 行程中的匯入時間，
+並檢查 bs4 / groq / httpx / pydantic / PIL 等較重的套件是否在啟動時就被載入。
+
+用法：
+    python Benchmarks/bench_import_time.py [--repeat 5] [--json result.json] [--check]
+
+--check：任一程式模組在匯入時就載入了重量級套件時，以結束代碼 1 結束 (可放在 CI 追蹤)。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CODES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Codes")
+HEAVY_MODULES = ["bs4", "groq", "httpx", "pydantic", "PIL"]
+
+# (名稱, 匯入程式碼, 是否為程式模組)；程式模組才會被 --check 檢查
+TARGETS = [
+    ("alt_engine", "import alt_engine", True),
+    ("alt_cli", "import alt_cli", True),
+    ("AI-Studio GUI", "import importlib.util as u; "
+                      "s = u.spec_from_file_location('gui', 'the_best_one_made_by_AI-Studio.py'); "
+                      "s.loader.exec_module(u.module_from_spec(s))", True),
+    ("Gemini GUI", "import importlib.util as u; "
+                   "s = u.spec_from_file_location('gui', 'the_one_made_by_me_with_Gemini.py'); "
+                   "s.loader.exec_module(u.module_from_spec(s))", True),
+    # 參考值：延後載入的套件本身需要的時間
+    ("(參考) PyQt6.QtWidgets", "import PyQt6.QtWidgets", False),
+    ("(參考) bs4", "import bs4", False),
+    ("(參考) groq", "import groq", False),
+    ("(參考) PIL.Image", "import PIL.Image", False),
+]
+
+MEASURE_SCRIPT = """
+import sys, time, json
+sys.path.insert(0, '.')
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"elapsed": elapsed, "loaded": loaded}}))
+"""
+
+
+def measure(code):
+    """在新的行程中執行一次匯入，回傳 (秒數, 已載入的重量級套件)；失敗時回傳 None。"""
+    script = MEASURE_SCRIPT.format(code=code, heavy=HEAVY_MODULES)
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    proc = subprocess.run([sys.executable, "-c", script], cwd=CODES_DIR, env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result["elapsed"], result["loaded"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="量測程式模組的匯入時間")
+    parser.add_argument("--repeat", type=int, default=5, help="每個項目重複量測的次數 (預設 5)")
+    parser.add_argument("--json", help="將結果輸出為 JSON 檔")
+    parser.add_argument("--check", action="store_true", help="程式模組在匯入時載入重量級套件則回傳 1")
+    args = parser.parse_args(argv)
+
+    results = []
+    check_failed = False
+    print(f"{'項目':<26}{'中位數 (ms)':>12}{'最小值 (ms)':>12}  啟動時已載入")
+    for name, code, is_app_module in TARGETS:
+        runs = [measure(code) for _ in range(args.repeat)]
+        if any(run is None for run in runs):
+            print(f"{name:<26}{'略過 (缺少相依套件)':>24}")
+            results.append({"name": name, "skipped": True})
+            continue
+        times = [elapsed * 1000 for elapsed, _ in runs]
+        loaded = runs[-1][1]
+        if is_app_module and loaded:
+            check_failed = True
+        print(f"{name:<26}{statistics.median(times):>12.1f}{min(times):>12.1f}  {', '.join(loaded) or '-'}")
+        results.append({
+            "name": name,
+            "median_ms": statistics.median(times),
+            "min_ms": min(times),
+            "heavy_modules_loaded": loaded,
+        })
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"python": sys.version, "repeat": args.repeat, "results": results},
+                      f, ensure_ascii=False, indent=2)
+
+    if args.check and check_failed:
+        print("錯誤：有程式模組在匯入時就載入了重量級套件。", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
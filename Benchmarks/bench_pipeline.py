@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+端對端流程基準測試：自動產生指定規模的網站 (網頁與圖片)，以命令列模式 (alt_cli) 跑完
+解析 → 產生 alt (AI 請求) → 寫回 的完整流程，量測圖片處理速度 (張/秒)、記憶體峰值與總耗時。
+
+AI 請求送往本機模擬伺服器，回應格式與 Groq chat-completions API 相同，
+可設定回應延遲、錯誤 (500) 與速率限制 (429 + retry-after) 的比例，結果不受網路與帳號額度影響。
+每次量測都在新的 Python 行程中執行，使用全新的網站副本與空白的快取資料夾 (HOME 指向暫存資料夾)。
+
+結果會附加到 Benchmarks/results/bench_pipeline.jsonl (每次執行一行)，
+並與上一筆設定相同的紀錄比較，用來追蹤效能退步。
+
+用法：
+    python Benchmarks/bench_pipeline.py [--pages 50] [--images-per-page 10] [--latency 0.3] [--error-rate 0.02]
+                                        [--rate-limit-rate 0.02] [--workers 8] [--repeat 1] [--no-save]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_DIR = os.path.join(BENCH_DIR, os.pardir, "Codes")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "bench_pipeline.jsonl")
+
+# 在新的行程中執行整個命令列流程；速率限制改為 --rpm / --tpm，快取位於暫存的 HOME 中
+PIPELINE_SCRIPT = """
+import sys, time, json
+sys.path.insert(0, {codes_dir!r})
+import alt_engine, alt_cli
+alt_engine.GROQ_API_KEY = "benchmark"
+alt_engine.GROQ_BASE_URL = {base_url!r}
+alt_engine.RETRY_BASE_DELAY = {retry_base_delay!r}
+alt_engine.BATCH_SMALL_IMAGES = {batch!r}
+alt_engine.rate_limiter = alt_engine.RateLimiter({rpm!r}, {tpm!r})
+try:
+    import resource
+    def peak_bytes(who):
+        peak = resource.getrusage(who).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    self_peak = lambda: peak_bytes(resource.RUSAGE_SELF)
+    children_peak = lambda: peak_bytes(resource.RUSAGE_CHILDREN)
+except ImportError: # Windows 沒有 resource 模組，只能量測 Python 物件的配置
+    import tracemalloc
+    tracemalloc.start()
+    self_peak = lambda: tracemalloc.get_traced_memory()[1]
+    children_peak = lambda: None
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    exit_code = alt_cli.main({argv!r})
+    elapsed = time.perf_counter() - start
+    print(json.dumps({{"exit_code": exit_code, "elapsed": elapsed,
+                      "peak_rss_bytes": self_peak(), "children_peak_rss_bytes": children_peak()}}))
+"""
+
+# 模擬網站的網頁：巢狀標記與文字，每 ALT_EVERY 張圖片有一張已經有 alt
+PAGE_HEADER = """<!DOCTYPE html>
+<html lang="zh-Hant"><head><meta charset="utf-8"><title>第 {page} 頁</title>
+<link rel="stylesheet" href="../css/site.css"></head>
+<body><nav><a href="../index.html">首頁</a> | <a href="../news/index.html">最新消息</a></nav>
+<main>
+"""
+PAGE_BLOCK = """<section class="card" data-id="{page}-{i}">
+  <h2>活動紀錄 {page}-{i} &amp; 成果分享</h2>
+  <p>本學期第 {i} 場活動的相關照片與說明，詳細內容請參考附件。&nbsp;<strong>歡迎轉知</strong>。</p>
+  <img src="../images/photo_{image}.png"{alt} width="{size}" height="{size}">
+</section>
+"""
+PAGE_FOOTER = """</main>
+<footer>© 2025 範例學校 — 自動產生的基準測試網頁</footer>
+</body></html>
+"""
+ALT_EVERY = 5
+PAGES_PER_DIR = 20
+
+
+def write_png(path, size, seed):
+    """以標準函式庫寫出 size x size 的 PNG 圖片，seed 不同時內容 (與雜湊) 也不同。"""
+    rng = random.Random(seed)
+    base = [rng.randrange(256) for _ in range(3)]
+    rows = []
+    for y in range(size):
+        row = bytearray(b"\x00") # 每列開頭的 filter 類型
+        for x in range(size):
+            row += bytes(((base[0] + x) % 256, (base[1] + y) % 256, (base[2] + x * y) % 256))
+        rows.append(bytes(row))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(b"".join(rows), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def make_site(root, pages, images_per_page, unique_images, image_size):
+    """產生網站，回傳 (網頁數, <img> 數, 缺少 alt 的 <img> 數, 不重複圖片數)。"""
+    os.makedirs(os.path.join(root, "images"))
+    for image in range(unique_images):
+        write_png(os.path.join(root, "images", f"photo_{image}.png"), image_size, image)
+
+    img_count = missing = 0
+    for page in range(pages):
+        page_dir = os.path.join(root, f"section_{page // PAGES_PER_DIR}")
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, f"page_{page}.html"), "w", encoding="utf-8") as f:
+            f.write(PAGE_HEADER.format(page=page))
+            for i in range(images_per_page):
+                has_alt = img_count % ALT_EVERY == ALT_EVERY - 1
+                alt = f' alt="活動照片 {page}-{i}"' if has_alt else ""
+                f.write(PAGE_BLOCK.format(page=page, i=i, image=img_count % unique_images, alt=alt, size=image_size))
+                img_count += 1
+                missing += not has_alt
+            f.write(PAGE_FOOTER)
+    return pages, img_count, missing, min(unique_images, img_count)
+
+
+class MockCaptionServer(ThreadingHTTPServer):
+    """
+    模擬 Groq chat-completions API 的本機伺服器。
+    每個請求依比例回傳 429 (附 retry-after 標頭) 或 500，其餘等待 latency 秒 (加上 ±jitter 比例的變化) 後回傳 alt 敘述；
+    一次包含多張圖片 (合併請求) 時回傳 JSON 字串陣列。
+    """
+    daemon_threads = True
+
+    def __init__(self, latency, jitter, error_rate, rate_limit_rate, retry_after, seed):
+        super().__init__(("127.0.0.1", 0), MockCaptionHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0}
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def next_outcome(self):
+        """回傳 ("ok" / "rate_limited" / "errors", 延遲秒數)。"""
+        with self.lock:
+            self.stats["requests"] += 1
+            roll = self.rng.random()
+            delay = self.latency * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+            if roll < self.rate_limit_rate:
+                outcome = "rate_limited"
+            elif roll < self.rate_limit_rate + self.error_rate:
+                outcome = "errors"
+            else:
+                outcome = "ok"
+            self.stats[outcome] += 1
+            return outcome, delay, self.stats["requests"]
+
+
+class MockCaptionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # 支援 keep-alive，與實際 API 相同可重用連線
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        outcome, delay, request_id = self.server.next_outcome()
+        if outcome == "rate_limited":
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                            {"retry-after": f"{self.server.retry_after:g}"})
+            return
+        time.sleep(delay)
+        if outcome == "errors":
+            self._send_json(500, {"error": {"message": "Internal server error", "type": "internal_server_error"}})
+            return
+
+        image_count = sum(1 for message in body.get("messages", []) for part in message.get("content", [])
+                          if isinstance(part, dict) and part.get("type") == "image_url")
+        if image_count > 1:
+            content = json.dumps([f"模擬的圖片敘述 {request_id}-{i}" for i in range(image_count)], ensure_ascii=False)
+        else:
+            content = f"模擬的圖片敘述 {request_id}"
+        self._send_json(200, {
+            "id": f"chatcmpl-{request_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 100 * max(1, image_count), "completion_tokens": 20 * max(1, image_count),
+                      "total_tokens": 120 * max(1, image_count)},
+        })
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def run_pipeline(site_template, work_dir, base_url, args):
+    """以全新的網站副本與快取跑一次命令列流程，回傳量測結果；失敗時回傳 None。"""
+    site = os.path.join(work_dir, "site")
+    home = os.path.join(work_dir, "home")
+    report_path = os.path.join(work_dir, "report.json")
+    shutil.copytree(site_template, site)
+    os.makedirs(home)
+
+    script_path = os.path.join(work_dir, "pipeline.py")
+    with open(script_path, "w", encoding="utf-8") as f:
+        f.write(PIPELINE_SCRIPT.format(
+            codes_dir=os.path.abspath(CODES_DIR), base_url=base_url, retry_base_delay=args.retry_base_delay,
+            batch=args.batch, rpm=args.rpm, tpm=args.tpm,
+            argv=[site, "--full-scan", "--workers", str(args.workers), "--report", report_path],
+        ))
+    env = dict(os.environ, HOME=home, USERPROFILE=home) # 快取、掃描索引與結果日誌都寫在暫存資料夾
+    proc = subprocess.run([sys.executable, script_path], cwd=work_dir, env=env, capture_output=True, text=True)
+    if proc.returncode != 0 or not proc.stdout.strip():
+        print(proc.stderr[-2000:], file=sys.stderr)
+        return None
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    with open(report_path, encoding="utf-8") as f:
+        report = json.load(f)
+    summary = report["summary"]
+    result.update({
+        "generated": summary.get("generated", 0),
+        "failed": summary.get("failed", 0),
+        "write_failed": summary.get("write_failed", 0),
+        "images_per_sec": summary.get("generated", 0) / result["elapsed"] if result["elapsed"] else 0.0,
+        "stages": report["metrics"]["stages"],
+    })
+    return result
+
+
+def git_revision():
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return proc.stdout.strip() or None
+
+
+def load_previous(results_path, config):
+    """回傳結果檔中最後一筆設定相同的紀錄，沒有時回傳 None。"""
+    if not os.path.exists(results_path):
+        return None
+    previous = None
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("config") == config:
+                previous = entry
+    return previous
+
+
+def format_change(current, previous, higher_is_better):
+    if not previous:
+        return ""
+    change = (current - previous) / previous * 100
+    better = change > 0 if higher_is_better else change < 0
+    return f" ({change:+.1f}%{'' if abs(change) < 5 else (' 改善' if better else ' 退步')})"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="以模擬的 AI 伺服器量測 解析 → 產生 alt → 寫回 的端對端效能")
+    parser.add_argument("--pages", type=int, default=50, help="網頁數 (預設 50)")
+    parser.add_argument("--images-per-page", type=int, default=10, help="每個網頁的 <img> 數 (預設 10)")
+    parser.add_argument("--unique-images", type=int, help="不重複的圖片數，少於 <img> 數時會重複使用 (預設每個 <img> 都不同)")
+    parser.add_argument("--image-size", type=int, default=256, help="圖片邊長 (像素，預設 256)")
+    parser.add_argument("--latency", type=float, default=0.3, help="模擬伺服器的平均回應延遲 (秒，預設 0.3)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="延遲的變化比例 (預設 ±0.3)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="回傳 500 錯誤的比例 (預設 0.02)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02, help="回傳 429 的比例 (預設 0.02)")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="429 回應的 retry-after 秒數 (預設 0.5)")
+    parser.add_argument("--retry-base-delay", type=float, default=0.1, help="指數退避的起始等待秒數 (預設 0.1)")
+    parser.add_argument("--workers", type=int, default=8, help="同時進行中的 AI 請求上限 (預設 8)")
+    parser.add_argument("--rpm", type=int, default=100000, help="用戶端的每分鐘請求數上限 (預設 100000，等同不限制)")
+    parser.add_argument("--tpm", type=int, default=100000000, help="用戶端的每分鐘 token 數上限 (預設等同不限制)")
+    parser.add_argument("--batch", action="store_true", help="開啟多圖片合併請求 (BATCH_SMALL_IMAGES)")
+    parser.add_argument("--repeat", type=int, default=1, help="重複量測的次數，結果取中位數 (預設 1)")
+    parser.add_argument("--seed", type=int, default=0, help="模擬伺服器錯誤與延遲的亂數種子 (預設 0)")
+    parser.add_argument("--results", default=RESULTS_PATH, help=f"保存結果的 JSON Lines 檔 (預設 {RESULTS_PATH})")
+    parser.add_argument("--no-save", action="store_true", help="不保存結果，只顯示")
+    args = parser.parse_args(argv)
+
+    unique_images = args.unique_images or args.pages * args.images_per_page
+    config = {
+        "pages": args.pages, "images_per_page": args.images_per_page, "unique_images": unique_images,
+        "image_size": args.image_size, "latency": args.latency, "jitter": args.jitter,
+        "error_rate": args.error_rate, "rate_limit_rate": args.rate_limit_rate, "retry_after": args.retry_after,
+        "retry_base_delay": args.retry_base_delay, "workers": args.workers, "rpm": args.rpm, "tpm": args.tpm,
+        "batch": args.batch,
+    }
+
+    runs = []
+    server_stats = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        site_template = os.path.join(temp_dir, "template")
+        pages, img_count, missing, unique = make_site(site_template, args.pages, args.images_per_page,
+                                                      unique_images, args.image_size)
+        print(f"網站：{pages} 個網頁，{img_count} 個 <img> (缺少 alt {missing} 個，不重複圖片 {unique} 張)")
+        print(f"模擬伺服器：延遲 {args.latency:g} 秒 ±{args.jitter:.0%}，錯誤 {args.error_rate:.0%}，"
+              f"429 {args.rate_limit_rate:.0%} (retry-after {args.retry_after:g} 秒)")
+
+        for repeat in range(args.repeat):
+            server = MockCaptionServer(args.latency, args.jitter, args.error_rate, args.rate_limit_rate,
+                                       args.retry_after, args.seed + repeat)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                run = run_pipeline(site_template, os.path.join(temp_dir, f"run_{repeat}"), server.base_url, args)
+            finally:
+                server.shutdown()
+                server.server_close()
+            if run is None:
+                print("量測失敗 (命令列流程無法完成)。", file=sys.stderr)
+                return 1
+            runs.append(run)
+            server_stats.append(dict(server.stats))
+            print(f"  第 {repeat + 1} 次：{run['elapsed']:.2f} 秒，{run['images_per_sec']:.1f} 張/秒，"
+                  f"記憶體峰值 {run['peak_rss_bytes'] / 1024 / 1024:.1f} MB，"
+                  f"產生 {run['generated']} / 失敗 {run['failed']}，伺服器收到 {server.stats['requests']} 個請求 "
+                  f"(429 {server.stats['rate_limited']}、500 {server.stats['errors']})")
+
+    result = {
+        "elapsed_s": statistics.median(run["elapsed"] for run in runs),
+        "images_per_sec": statistics.median(run["images_per_sec"] for run in runs),
+        "peak_rss_bytes": max(run["peak_rss_bytes"] for run in runs),
+        "children_peak_rss_bytes": max((run["children_peak_rss_bytes"] or 0) for run in runs) or None,
+        "generated": runs[-1]["generated"],
+        "failed": runs[-1]["failed"],
+        "write_failed": runs[-1]["write_failed"],
+        "server": server_stats[-1],
+        "stages": runs[-1]["stages"],
+    }
+    previous = load_previous(args.results, config)
+    previous_result = previous["result"] if previous else {}
+    print(f"\n中位數：總耗時 {result['elapsed_s']:.2f} 秒"
+          f"{format_change(result['elapsed_s'], previous_result.get('elapsed_s'), False)}，"
+          f"{result['images_per_sec']:.1f} 張/秒"
+          f"{format_change(result['images_per_sec'], previous_result.get('images_per_sec'), True)}，"
+          f"記憶體峰值 {result['peak_rss_bytes'] / 1024 / 1024:.1f} MB"
+          f"{format_change(result['peak_rss_bytes'], previous_result.get('peak_rss_bytes'), False)}")
+    if previous:
+        print(f"(與 {previous['timestamp']} 的紀錄比較，版本 {previous.get('git') or '未知'})")
+
+    if not args.no_save:
+        entry = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "config": config,
+            "result": result,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"結果已保存至 {args.results}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+解析後端一致性檢查：以每個已安裝的解析後端 (lxml / selectolax) 掃描測試網頁與各種容易判讀不同的寫法，
+確認 alt_engine.scan_img_tags 回傳的 <img> (順序與屬性) 與 html.parser 完全相同。
+寫回時以 html.parser 的位置修改檔案，兩者不同時 AI 結果會被浪費 (寫回前的檢查會拒絕儲存)。
+
+含有重複屬性或未結束的標籤等無法事先判斷的寫法不在此檢查，由寫回前的比對 (_locate_img_tags) 處理。
+不一致時以結束代碼 1 結束 (可放在 CI 追蹤)；未安裝的解析器會顯示為略過。
+
+用法：
+    python Benchmarks/check_backend_parity.py
+"""
+import glob
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_DIR = os.path.join(BENCH_DIR, os.pardir, "Codes")
+FIXTURES_DIR = os.path.join(BENCH_DIR, os.pardir, "Testing Webpage")
+sys.path.insert(0, CODES_DIR)
+
+import alt_engine
+
+# (名稱, HTML)：各解析器判讀可能不同的寫法
+CASES = [
+    ("一般標籤", '<IMG SRC="A.png">\n<img src="b.png" alt=""><p><img src=c.png alt=\'x\'></p>'),
+    ("raw text 元素", '<textarea><img src="t.png"></textarea><script>"<img src=s.png>"</script><img src="a.png">'),
+    ("<template>", '<template><img src="q.png" alt="tpl"></template><img src="q.png">'),
+    ("<plaintext>", '<img src="p.png"><plaintext><img src="z.png">'),
+    ("<image>", '<image src="i.png"><img src="r.png"><IMAGE SRC="x.png">'),
+    ("SVG 中的 <image>", '<svg><image href="s.png" src="s.png"></svg><img src="r.png">'),
+]
+
+
+def scan_attrs(path, backend):
+    return [tag.attrs for tag in alt_engine.scan_img_tags(path, backend=backend)]
+
+
+def main():
+    backends = [name for name in alt_engine.HTML_PARSER_PREFERENCE if name != "html.parser"]
+    installed = alt_engine.available_html_backends()
+    with tempfile.TemporaryDirectory() as work_dir:
+        targets = []
+        for i, (name, markup) in enumerate(CASES):
+            path = os.path.join(work_dir, f"case_{i}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(markup)
+            targets.append((name, path))
+        targets += [(os.path.basename(path), path) for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))]
+
+        failures = []
+        print(f"{'項目':<24}" + "".join(f"{name:>14}" for name in backends))
+        for name, path in targets:
+            expected = scan_attrs(path, "html.parser")
+            row = f"{name:<24}"
+            for backend in backends:
+                if backend not in installed:
+                    row += f"{'略過':>14}"
+                    continue
+                actual = scan_attrs(path, backend)
+                if actual == expected:
+                    row += f"{'一致':>14}"
+                else:
+                    row += f"{'不一致':>14}"
+                    failures.append(f"{name} ({backend})：{actual} != html.parser 的 {expected}")
+            print(row)
+
+    for failure in failures:
+        print(f"錯誤：{failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+連線重用檢查：以 bench_pipeline.py 的本機模擬伺服器確認 alt_engine.client_manager
+在多次取得客戶端、多個請求之間共用同一個客戶端與 keep-alive 連線池，不會每個請求或每個 worker 都重新連線。
+
+伺服器計算實際接受的 TCP 連線數：
+- 依序送出的請求只應使用 1 條連線；
+- 以 N 個執行緒同時送出時，連線數不超過 N (連線池上限)，且遠少於請求數。
+
+不符合時以結束代碼 1 結束 (可放在 CI 追蹤)。
+
+用法：
+    python Benchmarks/check_client_reuse.py [--requests 20] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_DIR = os.path.join(BENCH_DIR, os.pardir, "Codes")
+sys.path.insert(0, CODES_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import alt_engine
+from bench_pipeline import MockCaptionServer
+
+
+class CountingCaptionServer(MockCaptionServer):
+    """額外記錄接受的連線數的模擬伺服器 (不回傳錯誤與 429，只檢查連線)。"""
+    def __init__(self):
+        super().__init__(latency=0.01, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=0.0, seed=0)
+        self.connections = 0
+
+    def get_request(self):
+        request = super().get_request()
+        with self.lock:
+            self.connections += 1
+        return request
+
+
+def send_requests(count, max_connections):
+    """每個請求都重新向 client_manager 取得客戶端 (與每個 worker 的作法相同)，回傳取得的客戶端集合。"""
+    clients = set()
+    for i in range(count):
+        client = alt_engine.client_manager.get_client(max_connections)
+        clients.add(id(client))
+        client.chat.completions.create(model=alt_engine.GROQ_MODEL,
+                                       messages=[{"role": "user", "content": f"連線重用檢查 {i}"}])
+    return clients
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="檢查共用的 Groq 客戶端是否重用 keep-alive 連線")
+    parser.add_argument("--requests", type=int, default=20, help="每個階段送出的請求數 (預設 20)")
+    parser.add_argument("--workers", type=int, default=4, help="同時送出請求的執行緒數 (預設 4)")
+    args = parser.parse_args(argv)
+
+    server = CountingCaptionServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    alt_engine.GROQ_API_KEY = "check"
+    alt_engine.GROQ_BASE_URL = server.base_url
+    failures = []
+    try:
+        # 依序送出：全部請求共用同一條連線
+        clients = send_requests(args.requests, args.workers)
+        sequential_connections = server.connections
+        print(f"依序送出 {args.requests} 個請求：{sequential_connections} 條連線，{len(clients)} 個客戶端")
+        if len(clients) != 1:
+            failures.append(f"依序送出時建立了 {len(clients)} 個客戶端")
+        if sequential_connections != 1:
+            failures.append(f"依序送出時使用了 {sequential_connections} 條連線 (應為 1)")
+
+        # 同時送出：連線數不超過連線池上限
+        thread_clients = [set() for _ in range(args.workers)]
+        threads = [
+            threading.Thread(target=lambda i=i: thread_clients[i].update(send_requests(args.requests, args.workers)))
+            for i in range(args.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        concurrent_connections = server.connections - sequential_connections
+        all_clients = clients.union(*thread_clients)
+        print(f"{args.workers} 個執行緒同時送出 {args.requests * args.workers} 個請求："
+              f"新增 {concurrent_connections} 條連線，共 {len(all_clients)} 個客戶端")
+        if len(all_clients) != 1:
+            failures.append(f"同時送出時建立了 {len(all_clients)} 個客戶端")
+        if concurrent_connections > args.workers:
+            failures.append(f"同時送出時新增了 {concurrent_connections} 條連線 (上限 {args.workers})")
+        if server.stats["requests"] != args.requests * (args.workers + 1):
+            failures.append(f"伺服器收到 {server.stats['requests']} 個請求，與送出的數量不符")
+    finally:
+        alt_engine.client_manager.close()
+        server.shutdown()
+        server.server_close()
+
+    for failure in failures:
+        print(f"錯誤：{failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
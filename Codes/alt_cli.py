@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+自動網頁ALT生成系統的命令列模式 (不需要 PyQt6)。
+適合在 CI 或建置伺服器上批次處理整個網站資料夾，API Key 可透過環境變數 GROQ_API_KEY 設定。
+
+用法：
+    python alt_cli.py 網站資料夾或HTML檔案 [...] [--workers N] [--dry-run] [--no-write] [--report report.json] [--full-scan] [--timing]
+    python alt_cli.py --cache-stats
+    python alt_cli.py --purge-cache {thumbnails,alt,index,journal,all}
+
+上次掃描後未變更、且沒有缺少 alt 的檔案會直接略過 (記錄在掃描索引中)，--full-scan 可強制重新掃描全部檔案。
+每張圖片的結果一產生就寫入結果日誌，中斷後重新執行同一個資料夾時，已完成的圖片不會再呼叫 AI。
+JSON 報告的 metrics 欄位記錄各階段 (解析、圖片編碼、AI 請求、寫回等) 的次數、p50 / p95 耗時、上傳量與 token 用量，
+--timing 會在結束時另外輸出文字摘要。
+產生途中按 Ctrl+C 會停止送出新的請求，已完成的結果照常寫回；再按一次則立即結束。
+
+結束代碼：
+    0  全部完成 (或沒有缺少 alt 的圖片)
+    1  有圖片的 alt 產生失敗，或有檔案無法解析、寫入
+    2  找不到 HTML 檔案或 API 設定錯誤
+    3  --dry-run 模式下發現缺少 alt 的圖片
+    130 以 Ctrl+C 中途停止
+"""
+import argparse
+import json
+import signal
+import sys
+
+from alt_engine import (
+    MAX_CONCURRENT_REQUESTS, AltGenerator, AltTextCache, HtmlScanIndex, ResultJournal, ThumbnailDiskCache, client_manager,
+    CancellationToken, RunMetrics, collect_html_files, is_failed_alt_text, iter_parse_html_files, write_alt_texts_batch
+)
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_USAGE = 2
+EXIT_MISSING_ALT = 3
+EXIT_CANCELLED = 130
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="為網頁中缺少 alt 的圖片自動產生 alt 敘述 (命令列模式)")
+    parser.add_argument("paths", nargs="*", help="HTML 檔案或網站資料夾 (會遞迴搜尋 .html / .htm)")
+    parser.add_argument("-w", "--workers", type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help=f"同時進行中的 AI 請求上限 (預設 {MAX_CONCURRENT_REQUESTS})")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="只列出缺少 alt 的圖片，不呼叫 AI 也不修改檔案")
+    parser.add_argument("--no-write", action="store_true", help="產生 alt 敘述但不寫回 HTML 檔案")
+    parser.add_argument("-r", "--report", help="將處理結果輸出為 JSON 報告檔")
+    parser.add_argument("--cache-stats", action="store_true", help="顯示 alt 敘述快取與縮圖快取的使用量")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="忽略掃描索引，重新解析所有檔案 (包含上次掃描後未變更的檔案)")
+    parser.add_argument("--purge-cache", choices=("thumbnails", "alt", "index", "journal", "all"),
+                        help="清除指定的快取 (縮圖、alt 敘述、掃描索引、結果日誌或全部)")
+    parser.add_argument("--timing", action="store_true", help="結束時輸出各階段的耗時摘要")
+    return parser
+
+
+def manage_cache(args):
+    """處理 --purge-cache / --cache-stats，先清除再顯示統計。"""
+    alt_cache = AltTextCache()
+    thumbnail_cache = ThumbnailDiskCache()
+    scan_index = HtmlScanIndex()
+    journal = ResultJournal()
+    try:
+        if args.purge_cache in ("alt", "all"):
+            alt_cache.purge()
+            print("已清除 alt 敘述快取。")
+        if args.purge_cache in ("thumbnails", "all"):
+            thumbnail_cache.purge()
+            print("已清除縮圖快取。")
+        if args.purge_cache in ("index", "all"):
+            scan_index.purge()
+            print("已清除掃描索引。")
+        if args.purge_cache in ("journal", "all"):
+            journal.purge()
+            print("已清除結果日誌。")
+        if args.cache_stats:
+            stats = thumbnail_cache.stats()
+            print(f"alt 敘述快取：{alt_cache.entry_count()} 筆")
+            print(f"縮圖快取：{stats['entries']} 張，{stats['bytes'] / 1024 / 1024:.1f} MB "
+                  f"/ 上限 {stats['max_bytes'] / 1024 / 1024:.0f} MB ({stats['path']})")
+            print(f"掃描索引：{scan_index.entry_count()} 個檔案")
+            print(f"結果日誌：{journal.entry_count()} 筆尚未寫回的結果")
+    finally:
+        alt_cache.close()
+        scan_index.close()
+
+
+def print_progress_factory():
+    """建立進度回呼，每前進 10% 才輸出一行，避免 CI 紀錄過長。"""
+    last_step = [-1]
+
+    def on_progress(value, text):
+        step = value // 10
+        if step != last_step[0]:
+            last_step[0] = step
+            print(text, file=sys.stderr, flush=True)
+    return on_progress
+
+
+def install_cancel_handler(cancel_token):
+    """第一次 Ctrl+C 時取消產生作業，並還原預設處理方式，第二次 Ctrl+C 會立即結束程式。回傳原本的處理函式。"""
+    def on_interrupt(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("正在停止… 已完成的結果會保留並寫回，再按一次 Ctrl+C 立即結束。", file=sys.stderr, flush=True)
+        cancel_token.cancel()
+    return signal.signal(signal.SIGINT, on_interrupt)
+
+
+def finish_report(args, report, metrics):
+    """加入各階段的耗時後輸出報告，--timing 時另外輸出文字摘要。"""
+    report["metrics"] = metrics.to_report()
+    if args.timing:
+        print(metrics.format_summary(), file=sys.stderr)
+    write_report(args.report, report)
+
+
+def write_report(report_path, report):
+    if not report_path:
+        return
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.cache_stats or args.purge_cache:
+        manage_cache(args)
+        if not args.paths:
+            return EXIT_OK
+    elif not args.paths:
+        parser.error("請指定至少一個 HTML 檔案或網站資料夾")
+
+    html_files = collect_html_files(args.paths)
+    if not html_files:
+        print("錯誤：指定的路徑中不包含任何有效的 HTML 檔案 (.html, .htm)。", file=sys.stderr)
+        return EXIT_USAGE
+
+    metrics = RunMetrics()
+    report = {"files": [], "summary": {}}
+    file_entries = {} # {file_path: 報告中的檔案項目}
+    jobs = []
+    parse_failed = 0
+    scan_index = HtmlScanIndex()
+    try:
+        if args.full_scan:
+            files_to_scan, unchanged_files = html_files, []
+        else:
+            files_to_scan, unchanged_files = scan_index.split_unchanged(html_files)
+        # 多個檔案以多個行程平行解析，報告與處理順序仍依檔案順序
+        parsed = {file_path: (images_to_process, error) for file_path, images_to_process, error
+                  in iter_parse_html_files(files_to_scan, scan_index=scan_index, metrics=metrics)}
+    finally:
+        scan_index.close()
+    for file_path in html_files:
+        entry = {"file": file_path, "images": []}
+        report["files"].append(entry)
+        if file_path not in parsed:
+            entry["unchanged"] = True
+            continue
+        images_to_process, error = parsed[file_path]
+        if error:
+            print(f"解析檔案 {file_path} 失敗: {error}", file=sys.stderr)
+            entry["error"] = error
+            parse_failed += 1
+            continue
+
+        entry["images"] = [{"src": src} for _, src in images_to_process]
+        if images_to_process:
+            jobs.append((file_path, images_to_process))
+            file_entries[file_path] = entry
+
+    missing_count = sum(len(images_to_process) for _, images_to_process in jobs)
+    report["summary"] = {
+        "html_files": len(html_files),
+        "files_with_missing_alt": len(jobs),
+        "images_missing_alt": missing_count,
+        "parse_failed": parse_failed,
+        "unchanged_skipped": len(unchanged_files),
+    }
+    if unchanged_files:
+        print(f"略過 {len(unchanged_files)} 個上次掃描後未變更且沒有缺少 alt 的檔案。", file=sys.stderr)
+
+    if args.dry_run:
+        for file_path, images_to_process in jobs:
+            print(f"{file_path}: {len(images_to_process)} 張圖片缺少 alt")
+            for _, src in images_to_process:
+                print(f"    {src}")
+        print(f"共 {len(html_files)} 個檔案，{missing_count} 張圖片缺少 alt。")
+        finish_report(args, report, metrics)
+        if missing_count:
+            return EXIT_MISSING_ALT
+        return EXIT_FAILURES if parse_failed else EXIT_OK
+
+    if not jobs:
+        print(f"共 {len(html_files)} 個檔案，所有圖片均已包含 alt 敘述。")
+        finish_report(args, report, metrics)
+        return EXIT_FAILURES if parse_failed else EXIT_OK
+
+    journal = ResultJournal()
+    cancel_token = CancellationToken()
+    generator = AltGenerator(
+        max_workers=args.workers,
+        on_progress=print_progress_factory(),
+        on_error=lambda message: print(message, file=sys.stderr),
+        journal=journal,
+        cancel_token=cancel_token,
+        metrics=metrics,
+    )
+    previous_handler = install_cancel_handler(cancel_token)
+    try:
+        results = generator.run(jobs)
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        client_manager.close()
+    if results is None:
+        finish_report(args, report, metrics)
+        return EXIT_USAGE
+
+    generated_count = 0
+    failed_count = 0
+    cancelled_count = 0
+    write_failed = 0
+    write_jobs = [] # [(file_path, [(ImgTag, alt)])] 要寫回檔案的項目
+    for (file_path, _), file_results in zip(jobs, results):
+        entry = file_entries[file_path]
+        alt_texts = []
+        for image_entry, result in zip(entry["images"], file_results):
+            # 中途停止時，尚未完成的圖片沒有結果
+            if result is None:
+                image_entry["status"] = "cancelled"
+                cancelled_count += 1
+                continue
+            tag, _, alt_text = result
+            image_entry["alt"] = alt_text
+            # 產生失敗的錯誤訊息不寫入檔案，留待人工處理
+            if is_failed_alt_text(alt_text):
+                image_entry["status"] = "failed"
+                failed_count += 1
+                continue
+            image_entry["status"] = "generated"
+            generated_count += 1
+            alt_texts.append((tag, alt_text))
+
+        if alt_texts and not args.no_write:
+            write_jobs.append((file_path, alt_texts))
+
+    # 每個檔案都先寫入暫存檔再取代原檔，中途中斷也不會留下寫到一半的網頁
+    written_files = []
+    for file_path, error in write_alt_texts_batch(write_jobs, metrics=metrics):
+        entry = file_entries[file_path]
+        if error:
+            print(f"寫入檔案 {file_path} 時發生錯誤: {error}", file=sys.stderr)
+            entry["error"] = error
+            write_failed += 1
+        else:
+            entry["written"] = True
+            written_files.append(file_path)
+    # 已寫回的結果不再需要沿用；--no-write 時保留，下次執行可直接寫回
+    journal.discard_files(written_files)
+
+    report["summary"].update({
+        "generated": generated_count,
+        "failed": failed_count,
+        "write_failed": write_failed,
+        "cancelled": cancelled_count,
+    })
+    finish_report(args, report, metrics)
+    print(f"共 {len(html_files)} 個檔案：成功產生 {generated_count} 張，失敗 {failed_count} 張，"
+          f"寫入失敗 {write_failed} 個檔案。")
+
+    if cancel_token.cancelled:
+        print(f"已中途停止，{cancelled_count} 張圖片尚未產生，重新執行即可接續處理。", file=sys.stderr)
+        return EXIT_CANCELLED
+    if failed_count or parse_failed or write_failed:
+        return EXIT_FAILURES
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1812 @@
+# -*- coding: utf-8 -*-
+"""
+自動網頁ALT生成系統的核心邏輯 (HTML 解析與 AI alt 敘述產生)。
+不依賴 PyQt6，GUI (the_best_one_made_by_AI-Studio.py) 與命令列模式 (alt_cli.py) 共用。
+
+bs4、groq (連帶 httpx / pydantic) 與 Pillow 載入很慢，因此都延後到第一次用到時才匯入，
+讓 GUI 首頁不必等它們載入完成；AI 相關套件只有在自動模式真正開始處理時才會載入。
+HTML 只記錄 <img> 標籤 (有安裝 lxml 或 selectolax 時優先使用，否則以標準函式庫的 html.parser 串流掃描)，
+寫回時依記錄的位置只修改 alt 屬性。
+檔案只讀取一次 (大型檔案以 mmap 對應)，編碼依 BOM、<meta charset> 與實際內容判斷，寫回時沿用原本的編碼。
+"""
+import os
+import importlib.util
+import base64
+import codecs
+import contextlib
+import mmap
+import multiprocessing
+import mimetypes
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+import random
+import re
+import html
+import shutil
+import tempfile
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from io import BytesIO
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+
+# ##############################################################################
+# ##                          請在此處填寫您的 API KEY                          ##
+# ##############################################################################
+# 前往 https://console.groq.com/keys 取得您的 API Key
+# 也可以透過環境變數 GROQ_API_KEY 設定 (命令列模式較方便)
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "YOUR-KEY")
+GROQ_BASE_URL = None # 預設使用官方端點；測試時可改為本機模擬伺服器，例如 "http://127.0.0.1:8000"
+# ##############################################################################
+# ##                                API KEY 結束                               ##
+# ##############################################################################
+
+# --- AI 請求設定 ---
+GROQ_MODEL = "llama3-70b-8192"
+MAX_CONCURRENT_REQUESTS = 4 # 同時進行中的 AI 請求上限
+
+ALT_PROMPT_TEXT = """
+## 任務與目的
+* 為這張圖片生成一段符合 WCAG 2.1 AA 級無障礙標準的 alt 敘述。
+* 這段敘述應該簡潔、準確地描述圖片的內容與功能。
+* 請直接輸出描述文字，不要包含 "alt=" 或任何額外的引號或標籤。
+
+## 範例
+* 好的範例: "一位穿著紅色外套的女士正在公園裡遛狗。"
+* 不好的範例: "圖片", "照片", "alt='女士遛狗'"
+"""
+
+# --- HTTP 連線設定 ---
+HTTP_TIMEOUT = 60.0 # 單一請求逾時秒數
+HTTP_KEEPALIVE_EXPIRY = 120.0 # 閒置連線保留秒數，讓下一個檔案可直接重用
+
+# --- 速率限制與重試設定 (依帳號額度調整) ---
+RATE_LIMIT_REQUESTS_PER_MINUTE = 30 # 每分鐘請求數上限 (RPM)
+RATE_LIMIT_TOKENS_PER_MINUTE = 30000 # 每分鐘 token 數上限 (TPM)
+ESTIMATED_TOKENS_PER_REQUEST = 1500 # 送出前預估的 token 用量，完成後以實際用量修正
+MAX_RETRIES = 5 # 429 與暫時性錯誤的最大重試次數
+RETRY_BASE_DELAY = 1.0 # 指數退避的起始等待秒數
+RETRY_MAX_DELAY = 60.0 # 單次等待秒數上限
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# --- 取消 ---
+CANCEL_POLL_INTERVAL = 0.2 # 等待結果時檢查是否已取消的間隔秒數
+CANCEL_GRACE_PERIOD = 2.0 # 取消後最多再等待進行中請求的秒數，期間完成的結果仍會保留
+
+# --- 圖片上傳前處理 ---
+UPLOAD_MAX_EDGE = 1024 # 上傳前將圖片最長邊縮小至此像素 (0 表示不縮放)
+UPLOAD_FORMAT = "JPEG" # 重新編碼格式："JPEG" 或 "WEBP"
+UPLOAD_QUALITY = 85 # 重新編碼品質 (1-95)
+
+# --- 多圖片合併請求 (選用) ---
+BATCH_SMALL_IMAGES = False # 開啟後，小圖片會合併成同一個請求，prompt 只送一次
+BATCH_MAX_IMAGES = 5 # 每個請求最多合併的圖片數
+BATCH_SMALL_IMAGE_BYTES = 64 * 1024 # 檔案大小不超過此值的圖片才會被合併
+
+ALT_BATCH_PROMPT_TEXT = """
+## 任務與目的
+* 以下共有 {count} 張圖片，請依照圖片順序，為每一張圖片各生成一段符合 WCAG 2.1 AA 級無障礙標準的 alt 敘述。
+* 每段敘述應該簡潔、準確地描述圖片的內容與功能。
+
+## 輸出格式
+* 只輸出一個 JSON 字串陣列，陣列長度必須等於圖片數量，例如：["第一張圖片的敘述", "第二張圖片的敘述"]
+* 不要輸出陣列以外的任何文字，敘述中不要包含 "alt=" 或任何標籤。
+
+## 範例
+* 好的範例: "一位穿著紅色外套的女士正在公園裡遛狗。"
+* 不好的範例: "圖片", "照片", "alt='女士遛狗'"
+"""
+
+# AI 產生失敗時填入 alt 的訊息前綴 (GUI 會顯示給使用者修改，命令列模式不寫入檔案)
+FAILED_ALT_PREFIXES = ("AI生成失敗", "錯誤：")
+
+# --- HTML 掃描 ---
+HTML_SCAN_CHUNK_SIZE = 64 * 1024 # 串流掃描時每次解碼的位元組數，整份文件不會同時以字串形式留在記憶體中
+HTML_MMAP_THRESHOLD = 1024 * 1024 # 超過此大小的檔案以 mmap 對應，不整份讀入記憶體
+HTML_ENCODING_SNIFF_BYTES = 8192 # 在檔案開頭尋找 <meta charset> 宣告的範圍
+HTML_FALLBACK_ENCODINGS = ("utf-8", "big5", "gbk") # 沒有 BOM 也沒有宣告時依序嘗試，都無法解碼則使用 latin-1
+HTML_ENCODING_TRIAL_BYTES = 64 * 1024 # 試解碼候選編碼時只檢查開頭這麼多位元組，之後的錯誤由實際掃描時發現
+HTML_PARSE_PROCESSES = os.cpu_count() or 1 # 同時解析多個 HTML 檔案的行程數
+HTML_PARSE_PROCESS_MIN_BYTES = 1024 * 1024 # 檔案總大小低於此值時直接依序解析，啟動行程反而比較慢
+HTML_PARSER_BACKEND = "auto" # "auto" 依下列順序選用第一個已安裝的解析器，也可直接指定其中之一
+HTML_PARSER_PREFERENCE = ("lxml", "selectolax", "html.parser") # lxml / selectolax 為選用套件，html.parser 一定可用
+
+# --- HTML 寫回 ---
+HTML_WRITE_FSYNC = True # 批次寫回時先將內容同步到磁碟再取代原檔，當機或斷電時不會留下寫到一半的網頁
+
+# --- 快取設定 ---
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".alt_generator")
+ALT_CACHE_PATH = os.path.join(CACHE_DIR, "alt_cache.sqlite3")
+ALT_CACHE_MAX_ENTRIES = 50000 # 超過此筆數時，淘汰最久未使用的項目
+ALT_CACHE_TOUCH_BATCH = 256 # 命中時的使用時間先記在記憶體，累積到此筆數 (或下次寫入、關閉時) 才一次寫回
+THUMBNAIL_CACHE_DIR = os.path.join(CACHE_DIR, "thumbnails")
+THUMBNAIL_DISK_CACHE_MAX_BYTES = 200 * 1024 * 1024 # 縮圖磁碟快取的上限，超過時淘汰最久未使用的縮圖
+SCAN_INDEX_PATH = os.path.join(CACHE_DIR, "scan_index.sqlite3") # 各 HTML 檔案上次掃描的結果，未變更的檔案不必重新解析
+RESULT_JOURNAL_PATH = os.path.join(CACHE_DIR, "result_journal.jsonl") # 自動模式已完成的結果，中斷後重新執行時沿用
+RUN_REPORT_DIR = os.path.join(CACHE_DIR, "reports") # GUI 每次處理後輸出的效能報告 (JSON)
+
+# --- 圖片路徑與內容雜湊 ---
+def resolve_image_path(img_path, html_path):
+    """將 <img> 的 src 轉為絕對路徑 (相對路徑以 HTML 檔案所在目錄為基準)。"""
+    if not os.path.isabs(img_path):
+        img_path = os.path.join(os.path.dirname(html_path), img_path)
+    return os.path.normpath(os.path.abspath(img_path))
+
+def hash_image_file(path, chunk_size=1024 * 1024):
+    """分塊讀取並計算圖片內容的 SHA-256，檔案不存在或無法讀取時回傳 None。"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+def prepare_image_for_upload(img_full_path, max_edge=UPLOAD_MAX_EDGE,
+                             image_format=UPLOAD_FORMAT, quality=UPLOAD_QUALITY):
+    """
+    讀取圖片並在上傳前縮小、重新編碼，以減少上傳量與請求延遲。
+    回傳 (mime_type, image_bytes)。未安裝 Pillow、圖片無法解碼 (例如 SVG)
+    或重新編碼後沒有變小時，回傳原始檔案內容。
+    """
+    mime_type, _ = mimetypes.guess_type(img_full_path)
+    if not mime_type or not mime_type.startswith('image'):
+        raise ValueError("不支援的檔案類型")
+
+    with open(img_full_path, "rb") as image_file:
+        original_bytes = image_file.read()
+    try:
+        from PIL import Image as PilImage
+    except ImportError: # 未安裝 Pillow 時直接上傳原始圖片
+        return mime_type, original_bytes
+
+    try:
+        with PilImage.open(BytesIO(original_bytes)) as img:
+            if max_edge:
+                img.draft('RGB', (max_edge, max_edge)) # JPEG 可直接以較低解析度解碼
+                img.thumbnail((max_edge, max_edge)) # 保持比例，只縮小不放大
+            if image_format == "JPEG" and img.mode != 'RGB':
+                # JPEG 不支援透明度，透明區域以白色背景填滿
+                img = img.convert('RGBA')
+                background = PilImage.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel('A'))
+                img = background
+            elif img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA')
+            buffer = BytesIO()
+            img.save(buffer, format=image_format, quality=quality)
+    except Exception:
+        return mime_type, original_bytes
+
+    encoded_bytes = buffer.getvalue()
+    if len(encoded_bytes) >= len(original_bytes):
+        return mime_type, original_bytes
+    return f"image/{image_format.lower()}", encoded_bytes
+
+def parse_batch_alt_texts(content, expected_count):
+    """解析合併請求回傳的 JSON 字串陣列，格式或數量不符時回傳 None。"""
+    # 模型有時會在陣列外包上 ```json 區塊或說明文字，只取最外層的中括號
+    start, end = content.find('['), content.rfind(']')
+    if start == -1 or end <= start:
+        return None
+    try:
+        alt_texts = json.loads(content[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(alt_texts, list) or len(alt_texts) != expected_count:
+        return None
+    if not all(isinstance(alt_text, str) and alt_text.strip() for alt_text in alt_texts):
+        return None
+    return [alt_text.strip() for alt_text in alt_texts]
+
+# --- 共用 API 客戶端 ---
+def load_ai_backend():
+    """匯入 AI 相關套件 (httpx、groq)。只有真正要呼叫 AI 時才載入。"""
+    import httpx
+    import groq
+    return httpx, groq
+
+class GroqClientManager:
+    """
+    整個程式共用一個 Groq 客戶端與 httpx 連線池 (keep-alive)，
+    讓每個 worker、每個檔案都能重用既有連線，不必重新進行 TLS 交握。
+    只在主視窗關閉時呼叫 close()。
+    """
+    def __init__(self):
+        self._client = None
+        self._http_client = None
+        self._lock = threading.Lock()
+
+    def get_client(self, max_connections=MAX_CONCURRENT_REQUESTS):
+        """取得共用客戶端；max_connections 只在第一次建立連線池時生效。"""
+        with self._lock:
+            if self._client is None:
+                httpx, groq = load_ai_backend()
+                self._http_client = httpx.Client(
+                    timeout=HTTP_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_connections,
+                        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                    ),
+                )
+                # 重試由 AltGenerator._create_completion 依速率限制統一處理，停用 SDK 內建的重試
+                self._client = groq.Groq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL,
+                                    max_retries=0, http_client=self._http_client)
+            return self._client
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._http_client.close()
+            self._client = None
+            self._http_client = None
+
+client_manager = GroqClientManager()
+
+# --- 取消 ---
+class OperationCancelled(Exception):
+    """工作已被 CancellationToken 取消。"""
+
+class CancellationToken:
+    """
+    協作式取消：cancel() 後，等待中的重試與速率限制會立即結束並拋出 OperationCancelled，
+    尚未開始的圖片不再處理；不會像強制終止執行緒那樣留下未關閉的連線或檔案。
+    """
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise OperationCancelled()
+
+    def sleep(self, seconds):
+        """等待 seconds 秒；期間被取消時立即拋出 OperationCancelled。"""
+        if self._event.wait(max(0.0, seconds)):
+            raise OperationCancelled()
+
+def _sleep(seconds, cancel_token=None):
+    if cancel_token is None:
+        time.sleep(seconds)
+    else:
+        cancel_token.sleep(seconds)
+
+# --- 速率限制 ---
+class TokenBucket:
+    """每分鐘補滿 per_minute 個單位的權杖桶，數量不足時 acquire 會等待。"""
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.refill_rate = per_minute / 60.0 # 每秒補充量
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def acquire(self, amount=1, cancel_token=None):
+        amount = min(amount, self.capacity) # 單次需求超過容量時，最多等到桶滿
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait_seconds = (amount - self.tokens) / self.refill_rate
+            _sleep(wait_seconds, cancel_token)
+
+    def adjust(self, amount):
+        """以實際用量修正先前的預估 (amount 可為負數，代表歸還)。"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+class RateLimiter:
+    """同時追蹤 RPM 與 TPM，並在收到 retry-after 時讓所有請求一起暫停。"""
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, estimated_tokens, cancel_token=None):
+        while True:
+            with self._lock:
+                wait_seconds = self._blocked_until - time.monotonic()
+            if wait_seconds <= 0:
+                break
+            _sleep(wait_seconds, cancel_token)
+        self.request_bucket.acquire(1, cancel_token)
+        self.token_bucket.acquire(estimated_tokens, cancel_token)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        self.token_bucket.adjust(actual_tokens - estimated_tokens)
+
+    def block_for(self, seconds):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+# 額度是以帳號計算，所以所有 worker 共用同一個限制器
+rate_limiter = RateLimiter(RATE_LIMIT_REQUESTS_PER_MINUTE, RATE_LIMIT_TOKENS_PER_MINUTE)
+
+def get_retry_after_seconds(error):
+    """從 API 錯誤回應的 retry-after-ms / retry-after 標頭取得建議等待秒數。"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        retry_after = headers.get('retry-after')
+        if not retry_after:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError: # HTTP 日期格式
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable_error(error):
+    _, groq = load_ai_backend()
+    if isinstance(error, groq.APIConnectionError): # 包含逾時
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code in RETRYABLE_STATUS_CODES
+
+# --- HTML 檔案 ---
+def collect_html_files(paths):
+    """展開檔案與資料夾路徑，回傳其中所有 .html / .htm 檔案。"""
+    html_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for file in files:
+                    if file.lower().endswith(('.html', '.htm')):
+                        html_files.append(os.path.join(root, file))
+        elif os.path.isfile(path) and path.lower().endswith(('.html', '.htm')):
+            html_files.append(path)
+    return html_files
+
+class ImgTag:
+    """
+    掃描 HTML 時記錄的 <img> 標籤：在文件中的順序 (index)、原始標籤文字的位置與屬性。
+    start / end 為檔案解碼後文字中的字元位置 (保留原始換行)。只保留這些資料，不保留整棵文件樹。
+    lxml / selectolax 不提供原始位置，此時 start / end 為 None，寫回時才以 html.parser 補上。
+    occurrence 為「第幾個相同 src 的 <img>」，用來在不同解析器的結果之間對應同一個標籤。
+    """
+    __slots__ = ("index", "start", "end", "attrs", "occurrence")
+
+    def __init__(self, index, start, end, attrs):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.attrs = attrs
+        self.occurrence = 0
+
+    def get(self, name, default=None):
+        return self.attrs.get(name, default)
+
+    def __repr__(self):
+        return f"ImgTag(index={self.index}, src={self.get('src')!r})"
+
+# 瀏覽器 (以及 lxml / selectolax) 會把這些元素的內容當成純文字，其中的 <img> 不是真正的圖片
+_RAW_TEXT_ELEMENTS = ("textarea", "title", "xmp", "iframe", "noembed", "noframes", "plaintext")
+
+class _ImgTagScanner(HTMLParser):
+    """逐段餵入 HTML 文字，只記錄 <img> 標籤；斷詞規則與 BeautifulSoup 的 html.parser 相同。"""
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.tags = []
+        self._raw_text_element = None # 目前所在的純文字元素
+        self._fed_length = 0
+        # 尚未處理完的各行開頭位置 (getpos() 只提供行號與欄位)，已掃過的行會被丟棄
+        self._first_line = 1
+        self._line_starts = [0]
+
+    def feed(self, data):
+        pos = data.find("\n")
+        while pos != -1:
+            self._line_starts.append(self._fed_length + pos + 1)
+            pos = data.find("\n", pos + 1)
+        self._fed_length += len(data)
+        super().feed(data)
+
+    def handle_starttag(self, tag, attrs):
+        if self._raw_text_element:
+            return
+        if tag in _RAW_TEXT_ELEMENTS:
+            self._raw_text_element = tag
+            return
+        if tag != "img":
+            return
+        line, column = self.getpos()
+        del self._line_starts[:line - self._first_line]
+        self._first_line = line
+        start = self._line_starts[0] + column
+        # 沒有值的屬性 (例如 <img alt>) 與 BeautifulSoup 一樣視為空字串；重複的屬性以最後一個為準
+        attrs = {name: (value if value is not None else "") for name, value in attrs}
+        self.tags.append(ImgTag(len(self.tags), start, start + len(self.get_starttag_text()), attrs))
+
+    def handle_endtag(self, tag):
+        if tag == self._raw_text_element:
+            self._raw_text_element = None
+
+# --- HTML 編碼偵測 ---
+# (BOM, 編碼)；UTF-16 保留 BOM 字元，寫回時位元組順序與原檔相同
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+# 網頁常見的宣告名稱實際上是較大的字元集 (與瀏覽器的處理方式相同)
+_CHARSET_ALIASES = {"big5": "cp950", "gb2312": "gbk"}
+
+@contextlib.contextmanager
+def open_html_bytes(file_path):
+    """以唯讀方式取得檔案的位元組內容；大型檔案以 mmap 對應，不整份讀入記憶體。"""
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < HTML_MMAP_THRESHOLD: # mmap 無法對應空檔案，小檔案直接讀入也比較快
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+def _decode_chunks(data, encoding, chunk_size=HTML_SCAN_CHUNK_SIZE):
+    """從位元組內容逐段解碼；多位元組字元被切在段落之間時由增量解碼器接續。"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for offset in range(0, len(data), chunk_size):
+        text = decoder.decode(data[offset:offset + chunk_size])
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+def _can_decode(data, encoding, limit=HTML_ENCODING_TRIAL_BYTES):
+    """以增量解碼器試解碼開頭 limit 位元組 (None 表示整份)；只檢查開頭時，被截斷在結尾的多位元組字元不算錯誤。"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        if limit is not None and len(data) > limit:
+            decoder.decode(data[:limit])
+        else:
+            for _ in _decode_chunks(data, encoding, chunk_size=HTML_MMAP_THRESHOLD):
+                pass
+    except UnicodeDecodeError:
+        return False
+    return True
+
+def _declared_charset(data):
+    """在檔案開頭尋找 <meta charset> 或 http-equiv 的 charset 宣告，回傳 Python 的編碼名稱。"""
+    match = _META_CHARSET_RE.search(data[:HTML_ENCODING_SNIFF_BYTES])
+    if match is None:
+        return None
+    try:
+        encoding = codecs.lookup(match.group(1).decode('ascii')).name
+    except LookupError:
+        return None
+    if encoding.startswith(("utf-16", "utf-32")): # 能以 ASCII 讀到宣告，代表實際上不是 UTF-16/32
+        return "utf-8"
+    return _CHARSET_ALIASES.get(encoding, encoding)
+
+def detect_html_encoding(data, trial_bytes=HTML_ENCODING_TRIAL_BYTES):
+    """
+    判斷 HTML 位元組內容的編碼：依序檢查 BOM、<meta charset> 宣告，
+    都沒有 (或宣告與內容不符) 時在記憶體中依 HTML_FALLBACK_ENCODINGS 試解碼，不重新讀檔。
+    試解碼只檢查開頭 trial_bytes 位元組 (None 表示整份)。
+    """
+    for bom, encoding in _BOMS:
+        if data[:len(bom)] == bom:
+            return encoding
+    declared = _declared_charset(data)
+    candidates = dict.fromkeys(((declared,) if declared else ()) + HTML_FALLBACK_ENCODINGS)
+    for encoding in candidates:
+        if _can_decode(data, encoding, trial_bytes):
+            return encoding
+    return "latin-1" # 任何位元組都能以 latin-1 解碼
+
+def detect_html_file_encoding(file_path):
+    """讀取檔案並回傳編碼；與掃描時相同，依開頭判斷的編碼無法解碼整份檔案時改以整份內容重新判斷。"""
+    with open_html_bytes(file_path) as data:
+        encoding = detect_html_encoding(data)
+        if not _can_decode(data, encoding, None):
+            encoding = detect_html_encoding(data, trial_bytes=None)
+        return encoding
+
+# --- <img> 掃描後端 ---
+def _scan_with_html_parser(chunks):
+    scanner = _ImgTagScanner()
+    for chunk in chunks:
+        scanner.feed(chunk)
+    scanner.close()
+    return scanner.tags
+
+class _LxmlImgTarget:
+    """lxml 解析器的 target：只收集 <img> 的屬性，不建立文件樹。"""
+    def __init__(self):
+        self.tags = []
+
+    def start(self, tag, attrib):
+        if tag == "img":
+            attrs = {name: (value if value is not None else "") for name, value in attrib.items()}
+            self.tags.append(ImgTag(len(self.tags), None, None, attrs))
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return self.tags
+
+def _scan_with_lxml(chunks):
+    from lxml import etree
+
+    target = _LxmlImgTarget()
+    parser = etree.HTMLParser(target=target)
+    fed = False
+    for chunk in chunks:
+        parser.feed(chunk)
+        fed = True
+    if not fed: # 空檔案沒有任何內容可解析，lxml 會拋出錯誤
+        return target.tags
+    return parser.close()
+
+def _scan_with_selectolax(chunks):
+    from selectolax.lexbor import LexborHTMLParser
+
+    # selectolax 沒有逐段餵入的介面，需要一次傳入整份文件 (大型檔案不會使用此後端，見 _backend_for_file)
+    tree = LexborHTMLParser("".join(chunks))
+    tags = []
+    for node in tree.css("img"):
+        attrs = {name: (value if value is not None else "") for name, value in node.attributes.items()}
+        tags.append(ImgTag(len(tags), None, None, attrs))
+    return tags
+
+_HTML_SCANNERS = {
+    "lxml": _scan_with_lxml,
+    "selectolax": _scan_with_selectolax,
+    "html.parser": _scan_with_html_parser,
+}
+
+_WHOLE_DOCUMENT_BACKENDS = ("selectolax",) # 無法串流解析、需要整份文件字串的後端
+# lxml / selectolax 與 html.parser 判讀不同的寫法：<template> 的內容 (selectolax 不列出其中的 <img>)、
+# <plaintext> 之後的文字，以及 <image> (selectolax 依 HTML 規範當成 <img>)；
+# 含有這些標籤的文件一律以 html.parser 掃描，寫回時的位置才會一致 (Benchmarks/check_backend_parity.py 檢查)
+_BACKEND_DIVERGENT_MARKUP_RE = re.compile(rb"<(?:template|plaintext|image)[\s/>]", re.IGNORECASE)
+
+_installed_modules = {} # {模組名稱: 是否已安裝}，避免每個檔案都重新搜尋
+
+def available_html_backends():
+    """回傳目前環境中可用的解析器名稱 (依 HTML_PARSER_PREFERENCE 的順序)，只檢查是否安裝而不匯入。"""
+    for name in HTML_PARSER_PREFERENCE:
+        if name != "html.parser" and name not in _installed_modules:
+            _installed_modules[name] = importlib.util.find_spec(name) is not None
+    return [name for name in HTML_PARSER_PREFERENCE if name == "html.parser" or _installed_modules[name]]
+
+def resolve_html_backend(backend=None):
+    """決定實際使用的解析器；指定的解析器未安裝時退回 html.parser。"""
+    backend = backend or HTML_PARSER_BACKEND
+    available = available_html_backends()
+    if backend == "auto":
+        return available[0]
+    return backend if backend in available else "html.parser"
+
+def _backend_for_file(data, backend=None):
+    """
+    決定掃描這個檔案實際使用的解析器：無法串流的後端不用於大型檔案，
+    含有各解析器判讀不同的標籤 (見 _BACKEND_DIVERGENT_MARKUP_RE) 時改用 html.parser。
+    """
+    backend = resolve_html_backend(backend)
+    if backend == "html.parser":
+        return backend
+    if _BACKEND_DIVERGENT_MARKUP_RE.search(data):
+        return "html.parser"
+    if backend in _WHOLE_DOCUMENT_BACKENDS and len(data) > HTML_MMAP_THRESHOLD:
+        return next(name for name in available_html_backends() if name not in _WHOLE_DOCUMENT_BACKENDS)
+    return backend
+
+def _scan_html(file_path, encoding, chunk_size, backend):
+    """掃描 HTML 檔案，回傳 ([ImgTag, ...], 編碼, 實際使用的解析器)。"""
+    with open_html_bytes(file_path) as data:
+        backend = _backend_for_file(data, backend)
+        if encoding:
+            tags = _HTML_SCANNERS[backend](_decode_chunks(data, encoding, chunk_size))
+        else:
+            encoding = detect_html_encoding(data)
+            try:
+                tags = _HTML_SCANNERS[backend](_decode_chunks(data, encoding, chunk_size))
+            except UnicodeDecodeError: # 開頭之後才出現無法解碼的位元組，改以整份內容重新判斷
+                encoding = detect_html_encoding(data, trial_bytes=None)
+                tags = _HTML_SCANNERS[backend](_decode_chunks(data, encoding, chunk_size))
+    occurrences = {}
+    for tag in tags:
+        src = tag.get('src')
+        tag.occurrence = occurrences.get(src, 0)
+        occurrences[src] = tag.occurrence + 1
+    return tags, encoding, backend
+
+def scan_html_file(file_path, encoding=None, chunk_size=HTML_SCAN_CHUNK_SIZE, backend=None):
+    """
+    掃描 HTML 檔案，回傳 ([ImgTag, ...], 編碼)。
+    檔案只讀取一次；未指定 encoding 時由 detect_html_encoding() 自動判斷。
+    """
+    tags, encoding, _ = _scan_html(file_path, encoding, chunk_size, backend)
+    return tags, encoding
+
+def scan_img_tags(file_path, encoding=None, chunk_size=HTML_SCAN_CHUNK_SIZE, backend=None):
+    """掃描 HTML 檔案，依文件順序回傳所有 <img> 的 [ImgTag, ...]。"""
+    return scan_html_file(file_path, encoding, chunk_size, backend)[0]
+
+def parse_html_images(file_path):
+    """
+    掃描 HTML 檔案，回傳缺少 alt (或 alt 為空白) 且有 src 的 [(ImgTag, src), ...]。
+    """
+    images_to_process = []
+    for tag in scan_img_tags(file_path):
+        alt = tag.get('alt', None)
+        if alt is None or alt.strip() == "":
+            src = tag.get('src')
+            if src:
+                images_to_process.append((tag, src))
+    return images_to_process
+
+def file_fingerprint(file_path):
+    """回傳檔案的 (大小, 修改時間 (ns), SHA-256)，供 HtmlScanIndex 判斷檔案是否變更。"""
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns, hash_image_file(file_path)
+
+def _parse_html_images_job(file_path, with_fingerprint=False):
+    """
+    在子行程中執行，回傳 (file_path, [(ImgTag, src), ...], 錯誤訊息或 None, 檔案指紋或 None, {階段: 秒數})，
+    只有輕量的 ImgTag 會傳回主行程。指紋在解析前取得，解析期間檔案被修改時下次會重新掃描。
+    """
+    timings = {}
+    try:
+        start = time.perf_counter()
+        fingerprint = file_fingerprint(file_path) if with_fingerprint else None
+        parse_start = time.perf_counter()
+        if with_fingerprint:
+            timings["fingerprint"] = parse_start - start
+        images_to_process = parse_html_images(file_path)
+        timings["parse"] = time.perf_counter() - parse_start
+        return file_path, images_to_process, None, fingerprint, timings
+    except Exception as e:
+        return file_path, [], str(e), None, timings
+
+def iter_parse_html_files(file_paths, max_workers=HTML_PARSE_PROCESSES, scan_index=None, metrics=None):
+    """
+    解析多個 HTML 檔案，依完成順序產生 (file_path, [(ImgTag, src), ...], 錯誤訊息或 None)。
+    html.parser 是純 Python，執行緒無法同時解析，因此檔案較多時改用多個行程；
+    提前結束迭代 (close()) 時會取消尚未開始的檔案。
+    指定 scan_index (HtmlScanIndex) 時會記錄每個檔案的掃描結果，下次可略過未變更的檔案。
+    指定 metrics (RunMetrics) 時記錄每個檔案的解析時間 (在子行程中量測) 與檔案大小。
+    """
+    file_paths = list(file_paths)
+    with_fingerprint = scan_index is not None
+    total_bytes = sum(os.path.getsize(path) for path in file_paths if os.path.isfile(path))
+    max_workers = min(max_workers, len(file_paths))
+    try:
+        if max_workers <= 1 or total_bytes < HTML_PARSE_PROCESS_MIN_BYTES:
+            for file_path in file_paths:
+                yield _record_parse_result(scan_index, metrics, _parse_html_images_job(file_path, with_fingerprint))
+            return
+
+        # GUI 有多個執行緒，fork 可能造成死結，一律使用 spawn (與 Windows / macOS 的預設相同)
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = {executor.submit(_parse_html_images_job, file_path, with_fingerprint): file_path
+                       for file_path in file_paths}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e: # 子行程意外終止等情況
+                    result = futures[future], [], str(e), None, {}
+                yield _record_parse_result(scan_index, metrics, result)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        if scan_index is not None:
+            scan_index.commit()
+
+def _record_parse_result(scan_index, metrics, result):
+    file_path, images_to_process, error, fingerprint, timings = result
+    if scan_index is not None and error is None and fingerprint is not None and fingerprint[2] is not None:
+        scan_index.record(file_path, fingerprint, len(images_to_process))
+    if metrics is not None:
+        file_size = fingerprint[0] if fingerprint else _file_size(file_path)
+        for stage, seconds in timings.items():
+            metrics.record(stage, seconds, nbytes=file_size)
+    return file_path, images_to_process, error
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+# start tag 中的單一屬性 (名稱與可省略的值)，規則與 html.parser 相同
+_TAG_ATTRIBUTE_RE = re.compile(r"""(?P<name>[^\s/>"'=][^\s/>=]*)(?:\s*=\s*(?P<value>"[^"]*"|'[^']*'|[^\s>]*))?""")
+
+def _parse_start_tag(tag_text):
+    """以與掃描相同的規則解析單一 start tag，回傳 ImgTag；不是 <img> 時回傳 None。"""
+    scanner = _ImgTagScanner()
+    scanner.feed(tag_text)
+    scanner.close()
+    return scanner.tags[0] if len(scanner.tags) == 1 else None
+
+def _patch_alt_attribute(tag_text, alt_text):
+    """
+    只替換 <img> 原始標籤文字中的 alt 值 (沒有 alt 時插入在標籤名稱之後)，其餘字元保持不變。
+    修改後的結果無法如預期解析時回傳 None。
+    """
+    attribute = f'alt="{html.escape(alt_text, quote=True)}"'
+    alt_match = None
+    for match in _TAG_ATTRIBUTE_RE.finditer(tag_text, 4): # 跳過 "<img"
+        if match.group("name").lower() == "alt":
+            alt_match = match # 重複的屬性以最後一個為準
+    if alt_match:
+        patched = tag_text[:alt_match.start()] + attribute + tag_text[alt_match.end():]
+    else:
+        patched = f"{tag_text[:4]} {attribute}{tag_text[4:]}"
+
+    original, result = _parse_start_tag(tag_text), _parse_start_tag(patched)
+    if original is None or result is None or result.get("alt") != alt_text:
+        return None
+    if {k: v for k, v in result.attrs.items() if k != "alt"} != {k: v for k, v in original.attrs.items() if k != "alt"}:
+        return None
+    return patched
+
+def _copy_text(src, dst, count, chunk_size=HTML_SCAN_CHUNK_SIZE):
+    """從 src 複製 count 個字元到 dst；count 為 None 時複製到檔案結尾。"""
+    while count is None or count > 0:
+        chunk = src.read(chunk_size if count is None else min(chunk_size, count))
+        if not chunk:
+            break
+        dst.write(chunk)
+        if count is not None:
+            count -= len(chunk)
+
+def write_alt_texts(file_path, alt_texts, encoding=None, fsync=False):
+    """
+    將 [(ImgTag, alt), ...] 寫回 HTML 檔案。
+    依掃描時記錄的位置只修改這些 <img> 的 alt 屬性，其餘內容逐字串流複製到暫存檔後再取代原檔，
+    未修改的標記、空白與換行都保持原樣，並以原本的編碼寫回 (未指定 encoding 時重新判斷)；
+    該編碼無法表示的字元會寫成 &#...; 字元參照。
+    若對應位置已不是同一個 <img> (檔案在載入後被修改)，會拋出 ValueError 且不寫入。
+    少數無法安全修補的特殊寫法會改以 BeautifulSoup 重新輸出整份文件。
+    fsync 為 True 時，取代原檔前先將暫存檔同步到磁碟，取代後再同步所在資料夾。
+    """
+    _write_alt_texts(file_path, alt_texts, encoding, fsync)
+    if fsync:
+        _fsync_directory(os.path.dirname(os.path.abspath(file_path)))
+
+def write_alt_texts_batch(jobs, fsync=HTML_WRITE_FSYNC, on_file_written=None, metrics=None):
+    """
+    依序寫回多個檔案，jobs 為 [(file_path, [(ImgTag, alt), ...]), ...]。
+    每個檔案都先寫入暫存檔再取代原檔，單一檔案失敗不影響其他檔案；
+    fsync 時每個暫存檔各自同步，所在資料夾則在全部寫完後每個只同步一次。
+    每寫完一個檔案呼叫 on_file_written(完成數, 總數, file_path, 錯誤訊息或 None)，
+    回傳 [(file_path, 錯誤訊息或 None), ...]。
+    指定 metrics (RunMetrics) 時記錄每個檔案的寫入時間與寫入後的大小。
+    """
+    results = []
+    written_dirs = set()
+    for file_path, alt_texts in jobs:
+        start = time.perf_counter()
+        try:
+            _write_alt_texts(file_path, alt_texts, None, fsync)
+            written_dirs.add(os.path.dirname(os.path.abspath(file_path)))
+            error = None
+        except Exception as e:
+            error = str(e)
+        if metrics is not None and error is None:
+            metrics.record("write", time.perf_counter() - start, nbytes=_file_size(file_path))
+        results.append((file_path, error))
+        if on_file_written:
+            on_file_written(len(results), len(jobs), file_path, error)
+    if fsync:
+        start = time.perf_counter()
+        for directory in written_dirs:
+            _fsync_directory(directory)
+        if metrics is not None and written_dirs:
+            metrics.record("fsync_dirs", time.perf_counter() - start)
+    return results
+
+def _write_alt_texts(file_path, alt_texts, encoding, fsync):
+    encoding = encoding or detect_html_file_encoding(file_path)
+    if any(tag.start is None for tag, _ in alt_texts):
+        alt_texts = _locate_img_tags(file_path, alt_texts, encoding)
+    edits = sorted({tag.index: (tag, alt_text) for tag, alt_text in alt_texts}.values(), key=lambda edit: edit[0].start)
+    fd, temp_path = _make_temp_file(file_path)
+    needs_fallback = False
+    try:
+        with open(fd, 'w', encoding=encoding, errors='xmlcharrefreplace', newline='') as dst, \
+                open(file_path, 'r', encoding=encoding, newline='') as src:
+            position = 0
+            for tag, alt_text in edits:
+                _copy_text(src, dst, tag.start - position)
+                tag_text = src.read(tag.end - tag.start)
+                position = tag.end
+                current = _parse_start_tag(tag_text)
+                if current is None or current.get('src') != tag.get('src'):
+                    raise ValueError(f"檔案 {os.path.basename(file_path)} 在載入後已被修改，請重新載入後再儲存。")
+                patched = _patch_alt_attribute(tag_text, alt_text)
+                if patched is None:
+                    needs_fallback = True
+                    break
+                dst.write(patched)
+            else:
+                _copy_text(src, dst, None)
+                if fsync:
+                    _fsync_file(dst)
+    except BaseException:
+        _remove_temp_file(temp_path)
+        raise
+
+    if needs_fallback:
+        _remove_temp_file(temp_path)
+        _write_alt_texts_with_soup(file_path, alt_texts, encoding, fsync)
+    else:
+        _replace_file(temp_path, file_path)
+
+def _make_temp_file(path):
+    """在目標檔案旁建立名稱不重複的暫存檔並回傳 (fd, 路徑)；同一個資料夾才能以 os.replace 原子取代，也不會覆蓋使用者自己的 .tmp 檔。"""
+    directory = os.path.dirname(os.path.abspath(path))
+    return tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+
+def _remove_temp_file(temp_path):
+    """只刪除自己建立的暫存檔 (可能已被 os.replace 移走)。"""
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(temp_path)
+
+def _fsync_file(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+def _fsync_directory(directory):
+    """同步資料夾，讓 os.replace 的結果在斷電後也能保留 (Windows 無法開啟資料夾，略過)。"""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _replace_file(temp_path, file_path):
+    """以暫存檔取代原檔並保留原檔的權限；同一個檔案系統上的 os.replace 是不可分割的，不會出現寫到一半的檔案。"""
+    try:
+        shutil.copymode(file_path, temp_path)
+    except OSError:
+        pass
+    os.replace(temp_path, file_path)
+
+def _locate_img_tags(file_path, alt_texts, encoding):
+    """
+    lxml / selectolax 掃描的結果沒有原始位置；以 html.parser 重新掃描，換成帶有位置的 ImgTag。
+    未閉合的標籤、重複的屬性等少數寫法在不同解析器下會得到不同的 <img>，
+    因此先以載入時的解析器重新掃描，確認標籤未變，且兩者找到的 <img> (順序與屬性) 完全相同，
+    才依文件中的順序對應；不一致時拋出 ValueError 且不寫入，不會把 alt 寫到別的標籤上。
+    """
+    scanned, _, backend = _scan_html(file_path, encoding, HTML_SCAN_CHUNK_SIZE, None)
+    for tag, _ in alt_texts:
+        if tag.index >= len(scanned) or scanned[tag.index].attrs != tag.attrs:
+            raise ValueError(f"檔案 {os.path.basename(file_path)} 在載入後已被修改，請重新載入後再儲存。")
+    if backend == "html.parser":
+        return [(scanned[tag.index], alt_text) for tag, alt_text in alt_texts]
+
+    located = scan_img_tags(file_path, encoding=encoding, backend="html.parser")
+    if [tag.attrs for tag in located] != [tag.attrs for tag in scanned]:
+        raise ValueError(
+            f"檔案 {os.path.basename(file_path)} 中有 {backend} 與 html.parser 判讀不一致的 <img> "
+            f"(例如未閉合的標籤或重複的屬性)，為避免寫錯位置已停止寫入；"
+            f"請將 alt_engine.HTML_PARSER_BACKEND 設為 \"html.parser\" 後重新載入此檔案。")
+    return [(located[tag.index], alt_text) for tag, alt_text in alt_texts]
+
+def _write_alt_texts_with_soup(file_path, alt_texts, encoding, fsync=False):
+    """暫時以 BeautifulSoup 解析整份文件，依 <img> 的順序找到對應標籤後重新輸出。"""
+    from bs4 import BeautifulSoup
+
+    with open(file_path, 'r', encoding=encoding) as f:
+        soup = BeautifulSoup(f, 'html.parser')
+    img_tags = [img for img in soup.find_all('img') if img.find_parent(_RAW_TEXT_ELEMENTS) is None]
+    for tag, alt_text in alt_texts:
+        if tag.index >= len(img_tags) or img_tags[tag.index].get('src') != tag.get('src'):
+            raise ValueError(f"檔案 {os.path.basename(file_path)} 在載入後已被修改，請重新載入後再儲存。")
+        img_tags[tag.index]['alt'] = alt_text
+    fd, temp_path = _make_temp_file(file_path)
+    try:
+        with open(fd, 'w', encoding=encoding, errors='xmlcharrefreplace') as f:
+            f.write(soup.decode(eventual_encoding=None)) # 保留原本的 <meta charset>，str(soup) 會改寫成 utf-8
+            if fsync:
+                _fsync_file(f)
+    except BaseException:
+        _remove_temp_file(temp_path)
+        raise
+    _replace_file(temp_path, file_path)
+
+def is_failed_alt_text(alt_text):
+    """判斷 alt 是否為產生失敗時填入的錯誤訊息。"""
+    return alt_text.startswith(FAILED_ALT_PREFIXES)
+
+# --- alt 敘述快取 ---
+class AltTextCache:
+    """
+    以「圖片內容雜湊 + prompt + 模型」為鍵的 alt 敘述磁碟快取 (SQLite)。
+    相同圖片在不同頁面或下次執行時可直接取用，不需再呼叫 AI。
+    """
+    def __init__(self, db_path=ALT_CACHE_PATH, max_entries=ALT_CACHE_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock() # 執行緒池中的多個請求會同時存取
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS alt_cache ("
+            "key TEXT PRIMARY KEY, alt_text TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM alt_cache").fetchone()[0] # 之後由 put/_evict 維護，不再每次計數
+        self._pending_touches = {} # key -> 尚未寫回的 last_used
+
+    @staticmethod
+    def make_key(content_hash, prompt=ALT_PROMPT_TEXT, model=GROQ_MODEL):
+        digest = hashlib.sha256()
+        digest.update(model.encode('utf-8') + b"\0")
+        digest.update(prompt.encode('utf-8') + b"\0")
+        digest.update(content_hash.encode('ascii'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT alt_text FROM alt_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._pending_touches[key] = time.time()
+            if len(self._pending_touches) >= ALT_CACHE_TOUCH_BATCH:
+                self._flush_touches()
+                self._conn.commit()
+            return row[0]
+
+    def put(self, key, alt_text):
+        with self._lock:
+            now = time.time()
+            self._pending_touches.pop(key, None)
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO alt_cache (key, alt_text, last_used) VALUES (?, ?, ?)",
+                (key, alt_text, now)
+            ).rowcount
+            if inserted:
+                self._count += 1
+            else:
+                self._conn.execute("UPDATE alt_cache SET alt_text = ?, last_used = ? WHERE key = ?", (alt_text, now, key))
+            self._flush_touches()
+            self._evict()
+            self._conn.commit()
+
+    def _flush_touches(self):
+        """把累積的命中時間一次寫回 (由呼叫端 commit)，淘汰時才不會誤刪最近用過的項目。"""
+        if self._pending_touches:
+            self._conn.executemany(
+                "UPDATE alt_cache SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._pending_touches.items()]
+            )
+            self._pending_touches.clear()
+
+    def _evict(self):
+        if self._count > self.max_entries:
+            deleted = self._conn.execute(
+                "DELETE FROM alt_cache WHERE key IN "
+                "(SELECT key FROM alt_cache ORDER BY last_used ASC LIMIT ?)",
+                (self._count - self.max_entries,)
+            ).rowcount
+            self._count -= deleted
+
+    def stats_text(self):
+        return f"快取命中 {self.hits} / 未命中 {self.misses}"
+
+    def entry_count(self):
+        with self._lock:
+            return self._count
+
+    def purge(self):
+        with self._lock:
+            self._pending_touches.clear()
+            self._conn.execute("DELETE FROM alt_cache")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            self._count = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
+
+# --- 縮圖磁碟快取 ---
+class ThumbnailDiskCache:
+    """
+    預先縮小的縮圖 (PNG 位元組) 磁碟快取，以「圖片路徑 + 縮圖尺寸 + 修改時間」為鍵，
+    讓下次開啟同一個網站時不必重新解碼原圖。總大小超過上限時淘汰最久未使用的縮圖。
+    只處理位元組，編碼與解碼交給呼叫端 (Qt 或 Pillow)。
+    """
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, max_bytes=THUMBNAIL_DISK_CACHE_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock() # 縮圖由背景執行緒池讀寫
+        self.total_bytes = sum(size for _, size, _ in self._scan())
+
+    def _scan(self):
+        """回傳 [(檔案路徑, 大小, 最後使用時間), ...]。"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _entry_path(self, image_path, size):
+        try:
+            mtime_ns = os.stat(image_path).st_mtime_ns
+        except OSError:
+            return None
+        key = f"{os.path.abspath(image_path)}\0{size}\0{mtime_ns}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".png")
+
+    def get(self, image_path, size):
+        entry_path = self._entry_path(image_path, size)
+        data = None
+        if entry_path is not None:
+            try:
+                with open(entry_path, "rb") as f:
+                    data = f.read()
+                os.utime(entry_path) # 以修改時間記錄最後使用時間，供 LRU 淘汰
+            except OSError:
+                data = None
+        if data is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, image_path, size, data):
+        entry_path = self._entry_path(image_path, size)
+        if entry_path is None:
+            return
+        try:
+            fd, temp_path = _make_temp_file(entry_path)
+        except OSError:
+            return
+        try:
+            with open(fd, "wb") as f:
+                f.write(data)
+            try:
+                old_size = os.stat(entry_path).st_size # 覆寫既有縮圖時，舊檔的大小不再佔用空間
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(temp_path, entry_path) # 寫入完成才換上，避免讀到不完整的縮圖
+        except OSError:
+            _remove_temp_file(temp_path)
+            return
+        with self._lock:
+            self.total_bytes += len(data) - old_size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # 淘汰到上限的 90%，避免每次寫入都要重新掃描資料夾
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        self.total_bytes = sum(size for _, size, _ in entries)
+        target_bytes = self.max_bytes * 0.9
+        for entry_path, size, _ in entries:
+            if self.total_bytes <= target_bytes:
+                break
+            try:
+                os.remove(entry_path)
+                self.total_bytes -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        entries = self._scan()
+        with self._lock:
+            self.total_bytes = sum(size for _, size, _ in entries)
+            return {
+                "path": self.cache_dir,
+                "entries": len(entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def purge(self):
+        with self._lock:
+            for entry_path, _, _ in self._scan():
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+            # 寫入縮圖時程式中止留下的暫存檔 (_scan 不列出)
+            with os.scandir(self.cache_dir) as it:
+                temp_paths = [entry.path for entry in it if entry.is_file() and entry.name.endswith(".tmp")]
+            for temp_path in temp_paths:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            self.total_bytes = 0
+
+# --- HTML 掃描索引 ---
+class HtmlScanIndex:
+    """
+    記錄每個 HTML 檔案上次掃描時的大小、修改時間、內容雜湊與缺少 alt 的圖片數 (SQLite)。
+    再次處理同一個網站時，未變更且沒有缺少 alt 的檔案可在解析前直接略過；
+    只有修改時間改變 (例如重新 checkout) 但內容相同的檔案，以雜湊確認後同樣略過。
+    """
+    def __init__(self, db_path=SCAN_INDEX_PATH):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock() # 背景解析執行緒與 GUI 執行緒都會存取
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scan_index ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "content_hash TEXT NOT NULL, missing_count INTEGER NOT NULL, scanned_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def split_unchanged(self, file_paths):
+        """
+        將檔案分為 (需要掃描的檔案, 可略過的檔案)，兩者都保持原本的順序。
+        可略過：上次掃描後大小、修改時間 (或內容雜湊) 都沒有改變，且當時沒有缺少 alt 的圖片。
+        """
+        to_scan, unchanged = [], []
+        with self._lock:
+            for file_path in file_paths:
+                key = self._key(file_path)
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, content_hash, missing_count FROM scan_index WHERE path = ?", (key,)
+                ).fetchone()
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    to_scan.append(file_path) # 交給解析時回報錯誤
+                    continue
+                if row is None or row[3] != 0 or row[0] != stat.st_size:
+                    to_scan.append(file_path)
+                elif row[1] == stat.st_mtime_ns:
+                    unchanged.append(file_path)
+                elif hash_image_file(file_path) == row[2]:
+                    self._conn.execute("UPDATE scan_index SET mtime_ns = ? WHERE path = ?", (stat.st_mtime_ns, key))
+                    unchanged.append(file_path)
+                else:
+                    to_scan.append(file_path)
+            self._conn.commit()
+        return to_scan, unchanged
+
+    def record(self, file_path, fingerprint, missing_count):
+        """記錄檔案的掃描結果 (fingerprint 為 file_fingerprint() 的結果)，需呼叫 commit() 才會寫入磁碟。"""
+        size, mtime_ns, content_hash = fingerprint
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scan_index (path, size, mtime_ns, content_hash, missing_count, scanned_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(file_path), size, mtime_ns, content_hash, missing_count, time.time())
+            )
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def entry_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scan_index").fetchone()[0]
+
+    def purge(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM scan_index")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# --- 自動模式結果日誌 ---
+class ResultJournal:
+    """
+    自動模式已取得的 alt 敘述日誌 (JSON Lines，只附加不修改)。
+    每張圖片一有結果就立即寫入一行，程式關閉或當機後重新處理同一批檔案時，
+    已完成的圖片直接沿用，不必再呼叫 AI；檔案寫回或使用者放棄修改後再移除該檔案的紀錄。
+    每筆紀錄同時保存圖片內容雜湊與 HTML 檔案的 (大小, 修改時間)，
+    圖片內容或網頁在之後被修改時，該筆紀錄不再沿用。
+    """
+    def __init__(self, path=RESULT_JOURNAL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(html_path, tag):
+        """以 (HTML 檔案, src, 第幾個相同 src) 識別圖片，與寫回時對應標籤的方式相同。"""
+        return os.path.normcase(os.path.abspath(html_path)), tag.get('src'), tag.occurrence
+
+    @staticmethod
+    def html_signature(html_path):
+        """回傳 HTML 檔案的 (大小, 修改時間 (ns))，讀不到檔案時回傳 None。"""
+        try:
+            stat = os.stat(html_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def load(self):
+        """
+        回傳 {key: (alt, 圖片內容雜湊, HTML 的 (大小, 修改時間))}；同一張圖片有多筆紀錄時以最後一筆為準，
+        當機時寫到一半的行與缺少雜湊的舊格式紀錄會被略過。
+        """
+        entries = {}
+        with self._lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                            entries[(record["file"], record["src"], record["occurrence"])] = (
+                                record["alt"], record["image_hash"], (record["html_size"], record["html_mtime_ns"]))
+                        except (ValueError, KeyError, TypeError):
+                            continue
+            except FileNotFoundError:
+                pass
+        return entries
+
+    def append(self, html_path, tag, alt_text, image_hash, html_signature):
+        file_key, src, occurrence = self.make_key(html_path, tag)
+        html_size, html_mtime_ns = html_signature
+        line = json.dumps({"file": file_key, "src": src, "occurrence": occurrence, "image_hash": image_hash,
+                           "html_size": html_size, "html_mtime_ns": html_mtime_ns, "alt": alt_text},
+                          ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+    def discard_files(self, html_paths):
+        """移除已寫回或已放棄修改的檔案的紀錄 (以暫存檔重寫日誌後取代)。"""
+        file_keys = {os.path.normcase(os.path.abspath(path)) for path in html_paths}
+        with self._lock:
+            if not file_keys or not os.path.exists(self.path):
+                return
+            fd, temp_path = _make_temp_file(self.path)
+            try:
+                with open(fd, 'w', encoding='utf-8') as dst, open(self.path, 'r', encoding='utf-8') as src:
+                    for line in src:
+                        try:
+                            if json.loads(line)["file"] in file_keys:
+                                continue
+                        except (ValueError, KeyError, TypeError):
+                            continue
+                        dst.write(line)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                _remove_temp_file(temp_path)
+                raise
+
+    def entry_count(self):
+        return len(self.load())
+
+    def purge(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+# --- 效能量測 ---
+# 各階段在摘要與報告中的名稱，依處理流程排序；未列出的階段排在最後並直接顯示代號
+STAGE_LABELS = {
+    "page_load": "載入檔案 (至列表建立完成)",
+    "fingerprint": "計算檔案指紋",
+    "parse": "讀取並解析 HTML",
+    "populate_ui": "建立圖片列表",
+    "generate": "自動生成 (全部圖片)",
+    "hash_image": "計算圖片雜湊",
+    "rate_limit_wait": "等待速率限制",
+    "image_prepare": "讀取並縮小圖片",
+    "base64_encode": "Base64 編碼",
+    "request": "AI 請求 (網路)",
+    "retry_wait": "重試等待",
+    "write": "寫回 HTML",
+    "fsync_dirs": "同步資料夾",
+}
+
+def _percentile(sorted_values, percent):
+    """最近排名法 (nearest-rank) 的百分位數，sorted_values 需已排序且不為空。"""
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def _format_bytes(nbytes):
+    if nbytes >= 1024 * 1024:
+        return f"{nbytes / 1024 / 1024:.2f} MB"
+    return f"{nbytes / 1024:.1f} KB"
+
+class RunMetrics:
+    """
+    記錄一次處理中各階段的耗時、位元組數與 token 數，用來找出自動模式實際的瓶頸。
+    每次量測的耗時都會保留以計算 p50 / p95；可同時由多個執行緒記錄。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {} # {stage: {"durations": [秒數, ...], "bytes": int, "tokens": int}}
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+
+    def record(self, stage, seconds, nbytes=0, tokens=0):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {"durations": [], "bytes": 0, "tokens": 0})
+            entry["durations"].append(seconds)
+            entry["bytes"] += nbytes
+            entry["tokens"] += tokens
+
+    @contextlib.contextmanager
+    def measure(self, stage, nbytes=0, tokens=0):
+        """以 with 量測一段程式的耗時；區塊中拋出例外時同樣會記錄。"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, nbytes, tokens)
+
+    def summary(self):
+        """回傳 {stage: {"count", "total_ms", "p50_ms", "p95_ms", "max_ms", "bytes", "tokens"}}，依處理流程排序。"""
+        order = list(STAGE_LABELS)
+        with self._lock:
+            stages = {stage: (sorted(entry["durations"]), entry["bytes"], entry["tokens"])
+                      for stage, entry in self._stages.items()}
+        result = {}
+        for stage in sorted(stages, key=lambda stage: order.index(stage) if stage in order else len(order)):
+            durations, nbytes, tokens = stages[stage]
+            result[stage] = {
+                "count": len(durations),
+                "total_ms": round(sum(durations) * 1000, 2),
+                "p50_ms": round(_percentile(durations, 50) * 1000, 2),
+                "p95_ms": round(_percentile(durations, 95) * 1000, 2),
+                "max_ms": round(durations[-1] * 1000, 2),
+                "bytes": nbytes,
+                "tokens": tokens,
+            }
+        return result
+
+    def to_report(self, **extra):
+        """回傳可輸出為 JSON 的報告；extra 會併入報告最上層 (例如檔案數、圖片數)。"""
+        report = {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "wall_time_s": round(time.perf_counter() - self._start, 3),
+        }
+        report.update(extra)
+        report["stages"] = self.summary()
+        return report
+
+    def write_report(self, path, **extra):
+        """將報告寫成 JSON 檔 (必要時建立資料夾)，回傳報告內容。"""
+        report = self.to_report(**extra)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    def format_summary(self):
+        """回傳每個階段一行的文字摘要，供 GUI 摘要面板與命令列輸出。"""
+        lines = []
+        for stage, stats in self.summary().items():
+            line = (f"{STAGE_LABELS.get(stage, stage)}：{stats['count']} 次，合計 {stats['total_ms'] / 1000:.2f} 秒，"
+                    f"p50 {stats['p50_ms']:.1f} ms，p95 {stats['p95_ms']:.1f} ms")
+            if stats["bytes"]:
+                line += f"，{_format_bytes(stats['bytes'])}"
+            if stats["tokens"]:
+                line += f"，{stats['tokens']} tokens"
+            lines.append(line)
+        lines.append(f"總耗時：{time.perf_counter() - self._start:.2f} 秒")
+        return "\n".join(lines)
+
+# --- AI alt 敘述產生器 ---
+class AltGenerator:
+    """
+    不依賴 GUI 的 alt 敘述產生流程，GUI 的 GroqWorker 與命令列模式共用。
+    所有 job 的圖片會攤平成同一個佇列，交給共用的執行緒池處理；
+    進度、單張結果與錯誤透過回呼函式回報 (回呼會在背景執行緒中被呼叫)。
+    指定 journal (ResultJournal) 時，日誌中已有結果的圖片直接沿用，新的結果也會立即寫入日誌。
+    cancel_token (CancellationToken) 被取消時，尚未開始的圖片不再處理，run() 會在短時間內返回。
+    各階段的耗時、上傳量與 token 用量記錄在 metrics (RunMetrics)。
+    """
+    def __init__(self, max_workers=MAX_CONCURRENT_REQUESTS,
+                 on_progress=None, on_item_finished=None, on_error=None, journal=None, cancel_token=None,
+                 metrics=None):
+        self.max_workers = max(1, max_workers)
+        self.journal = journal
+        self.cancel_token = cancel_token or CancellationToken()
+        self.metrics = metrics or RunMetrics()
+        self.on_progress = on_progress or (lambda value, text: None)
+        self.on_item_finished = on_item_finished or (lambda job_index, item_index, alt_text: None)
+        self.on_error = on_error or (lambda message: None)
+        self.jobs = []
+        self.client = None
+        self.html_signatures = []
+        self.cache = None
+
+    def run(self, jobs):
+        """
+        jobs: [(html_path, images_to_process), ...]，每個 HTML 檔案為一個 job。
+        回傳與 jobs 對應的結果 [[(tag, img_path, alt_text), ...], ...]；
+        API 客戶端無法建立時回傳 None；被取消時回傳目前為止的結果，未完成的位置為 None。
+        """
+        with self.metrics.measure("generate"):
+            return self._run(jobs)
+
+    def _run(self, jobs):
+        self.jobs = jobs
+        # 依原始順序預留位置，讓結果順序不受完成先後影響
+        results = [[None] * len(images_to_process) for _, images_to_process in self.jobs]
+        total_images = sum(len(images_to_process) for _, images_to_process in self.jobs)
+        # 全域佇列: (job_index, item_index, 圖片絕對路徑)
+        all_items = [
+            (job_index, item_index, resolve_image_path(img_path, html_path))
+            for job_index, (html_path, images_to_process) in enumerate(self.jobs)
+            for item_index, (tag, img_path) in enumerate(images_to_process)
+        ]
+        # 各 HTML 檔案的 (大小, 修改時間)，與圖片內容雜湊一起寫入結果日誌
+        self.html_signatures = [ResultJournal.html_signature(html_path) for html_path, _ in self.jobs]
+        completed = 0
+
+        # 不使用 with：取消時不等待進行中的請求結束，run() 才能在有限時間內返回
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        groups = {} # {content_hash 或 路徑: (圖片絕對路徑, 內容雜湊, 檔案大小, [(job_index, item_index)])}
+        futures = {}
+        try:
+            # 先計算每張圖片的內容雜湊：日誌只沿用圖片內容未變的結果，相同圖片也只送出一次請求
+            unique_paths = list(dict.fromkeys(path for _, _, path in all_items))
+            path_hashes = {}
+            path_sizes = {} # 與雜湊同時量測，分組時不再讀取檔案資訊 (圖片可能已被刪除)
+            for path, (content_hash, size) in zip(unique_paths, executor.map(self._hash_image_file, unique_paths)):
+                self.cancel_token.raise_if_cancelled()
+                path_hashes[path] = content_hash
+                path_sizes[path] = size
+
+            completed = self._restore_from_journal(results, all_items, path_hashes)
+            if completed == total_images:
+                self.on_progress(100, f"所有圖片處理完成！(沿用上次執行的 {completed} 筆結果)")
+                return results
+
+            if not GROQ_API_KEY or GROQ_API_KEY == "YOUR-KEY":
+                self.on_error("錯誤：尚未設定 Groq API Key。")
+                return None
+
+            try:
+                self.client = client_manager.get_client(self.max_workers)
+            except Exception as e:
+                self.on_error(f"API 客戶端初始化失敗: {e}")
+                return None
+
+            try:
+                self.cache = AltTextCache()
+            except Exception as e:
+                # 快取無法使用時仍可繼續，只是每張圖片都會呼叫 AI
+                self.on_error(f"alt 快取無法開啟，將不使用快取: {e}")
+                self.cache = None
+
+            self.on_progress(int((completed / total_images) * 100), f"正在處理圖片 {completed}/{total_images}...")
+            # 日誌中已有結果的圖片不再處理；其餘依內容雜湊分組
+            for job_index, item_index, path in all_items:
+                if results[job_index][item_index] is not None:
+                    continue
+                content_hash = path_hashes[path]
+                group_key = content_hash or path # 讀不到檔案時以路徑分組
+                groups.setdefault(group_key, (path, content_hash, path_sizes[path], []))[3].append((job_index, item_index))
+
+            # 每個 task 為一次請求要處理的圖片；開啟合併模式時，小圖片會被合併成同一個 task
+            tasks = self._build_tasks(list(groups.values()))
+
+            # 以執行緒池同時送出多個請求，同時進行中的請求數量不超過 max_workers
+            futures = {executor.submit(self._generate_alt_texts, task): task for task in tasks}
+            pending = set(futures)
+            while pending and not self.cancel_token.cancelled:
+                done, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    completed += self._deliver_results(futures[future], future, results)
+                    self.on_progress(int((completed / total_images) * 100), f"正在處理圖片 {completed}/{total_images} (共 {len(groups)} 張不重複圖片)...{self._cache_stats_text()}")
+
+            if pending:
+                # 已取消：尚未開始的請求直接取消，進行中的請求最多再等待 CANCEL_GRACE_PERIOD 秒，
+                # 期間完成的結果仍會回報並寫入日誌
+                for future in pending:
+                    future.cancel()
+                done, _ = wait(pending, timeout=CANCEL_GRACE_PERIOD)
+                for future in done:
+                    if not future.cancelled():
+                        completed += self._deliver_results(futures[future], future, results)
+        except OperationCancelled:
+            pass
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._close_cache_when_idle(futures)
+
+        if self.cancel_token.cancelled:
+            self.on_progress(int((completed / total_images) * 100), f"已停止：完成 {completed}/{total_images} 張圖片，已完成的結果均已保留。")
+            return results
+
+        self.on_progress(100, f"所有圖片處理完成！{self._cache_stats_text()}")
+        return results
+
+    def _close_cache_when_idle(self, futures):
+        """
+        寫回累積的使用時間並關閉快取。取消後逾時仍未結束的請求可能還會讀寫快取，
+        等這些請求全部結束後 (由最後一個的 done callback) 才關閉。
+        """
+        cache = self.cache
+        if cache is None:
+            return
+        running = [future for future in futures if not future.done()]
+        if not running:
+            cache.close()
+            return
+        remaining = [len(running)]
+        lock = threading.Lock()
+
+        def on_done(_):
+            with lock:
+                remaining[0] -= 1
+                is_last = remaining[0] == 0
+            if is_last:
+                cache.close()
+
+        for future in running:
+            future.add_done_callback(on_done) # 在加入前已結束的 future 會立即呼叫
+
+    def _hash_image_file(self, path):
+        """回傳 (內容雜湊, 檔案大小)；讀不到檔案時雜湊為 None。"""
+        size = _file_size(path)
+        with self.metrics.measure("hash_image", nbytes=size):
+            return hash_image_file(path), size
+
+    def _deliver_results(self, task, future, results):
+        """將一個 task 的結果分送給所有對應的 <img>，回傳完成的項目數；task 因取消而中止時回傳 0。"""
+        try:
+            alt_texts = future.result()
+        except OperationCancelled:
+            return 0
+        delivered = 0
+        for (path, content_hash, _, targets), alt_text in zip(task, alt_texts):
+            # 將同一張圖片的結果分送給所有對應的 <img>
+            for job_index, item_index in targets:
+                tag, img_path = self.jobs[job_index][1][item_index]
+                results[job_index][item_index] = (tag, img_path, alt_text)
+                self._journal_result(job_index, tag, alt_text, content_hash)
+                self.on_item_finished(job_index, item_index, alt_text)
+                delivered += 1
+        return delivered
+
+    def _restore_from_journal(self, results, all_items, path_hashes):
+        """
+        將日誌中已有的結果填入 results 並回報，回傳沿用的筆數。
+        只沿用圖片內容雜湊與 HTML 檔案的 (大小, 修改時間) 都和記錄時相同的結果。
+        """
+        if not self.journal:
+            return 0
+        try:
+            journaled = self.journal.load()
+        except OSError as e:
+            self.on_error(f"結果日誌無法讀取，將重新處理所有圖片: {e}")
+            return 0
+        restored = 0
+        for job_index, item_index, path in all_items:
+            html_path, images_to_process = self.jobs[job_index]
+            tag, img_path = images_to_process[item_index]
+            entry = journaled.get(ResultJournal.make_key(html_path, tag))
+            if entry is None:
+                continue
+            alt_text, image_hash, html_signature = entry
+            if image_hash is None or image_hash != path_hashes[path] or \
+                    self.html_signatures[job_index] is None or tuple(html_signature) != self.html_signatures[job_index]:
+                continue
+            results[job_index][item_index] = (tag, img_path, alt_text)
+            self.on_item_finished(job_index, item_index, alt_text)
+            restored += 1
+        return restored
+
+    def _journal_result(self, job_index, tag, alt_text, content_hash):
+        # 產生失敗的結果與讀不到的圖片不寫入日誌，下次執行時重試
+        if not self.journal or is_failed_alt_text(alt_text) or content_hash is None \
+                or self.html_signatures[job_index] is None:
+            return
+        try:
+            self.journal.append(self.jobs[job_index][0], tag, alt_text, content_hash, self.html_signatures[job_index])
+        except OSError as e:
+            self.on_error(f"結果日誌寫入失敗: {e}")
+            self.journal = None
+
+    def _cache_stats_text(self):
+        return f" ({self.cache.stats_text()})" if self.cache else ""
+
+    def _build_tasks(self, groups):
+        if not BATCH_SMALL_IMAGES:
+            return [[group] for group in groups]
+
+        tasks = []
+        small_groups = []
+        for group in groups:
+            _, content_hash, size, _ = group
+            if content_hash is not None and size <= BATCH_SMALL_IMAGE_BYTES:
+                small_groups.append(group)
+            else:
+                tasks.append([group])
+        for i in range(0, len(small_groups), BATCH_MAX_IMAGES):
+            tasks.append(small_groups[i:i + BATCH_MAX_IMAGES])
+        return tasks
+
+    def _generate_alt_texts(self, task):
+        """處理一個 task，依序回傳 task 中每張圖片的 alt 敘述。"""
+        if len(task) == 1:
+            path, content_hash, _, _ = task[0]
+            return [self._generate_alt_text(path, content_hash)]
+
+        alt_texts = [None] * len(task)
+        pending = [] # 快取中沒有結果、需要呼叫 AI 的圖片索引
+        for i, (path, content_hash, _, _) in enumerate(task):
+            cached_alt = self.cache.get(AltTextCache.make_key(content_hash)) if self.cache else None
+            if cached_alt is None:
+                pending.append(i)
+            else:
+                alt_texts[i] = cached_alt
+
+        if len(pending) > 1:
+            try:
+                batch_alt_texts = self._request_batch([task[i][0] for i in pending])
+            except OperationCancelled:
+                raise
+            except Exception as e:
+                if self.cancel_token.cancelled:
+                    raise OperationCancelled() from e
+                self.on_error(f"合併請求失敗，改為逐張處理: {e}")
+                batch_alt_texts = None
+            if batch_alt_texts is not None:
+                for i, alt_text in zip(pending, batch_alt_texts):
+                    alt_texts[i] = alt_text
+                    if self.cache:
+                        self.cache.put(AltTextCache.make_key(task[i][1]), alt_text)
+                pending = []
+
+        # 回傳格式無法解析或請求失敗時，退回逐張請求
+        for i in pending:
+            path, content_hash, _, _ = task[i]
+            alt_texts[i] = self._generate_alt_text(path, content_hash, check_cache=False)
+        return alt_texts
+
+    def _request_batch(self, img_full_paths):
+        """將多張圖片放進同一個請求，回傳解析後的 alt 敘述列表，無法解析時回傳 None。"""
+        content = [{"type": "text", "text": ALT_BATCH_PROMPT_TEXT.format(count=len(img_full_paths))}]
+        content.extend(self._image_content_part(path) for path in img_full_paths)
+        chat_completion = self._create_completion(
+            messages=[{"role": "user", "content": content}],
+            model=GROQ_MODEL,
+            estimated_tokens=ESTIMATED_TOKENS_PER_REQUEST * len(img_full_paths),
+        )
+        return parse_batch_alt_texts(chat_completion.choices[0].message.content, len(img_full_paths))
+
+    def _image_content_part(self, img_full_path):
+        # 讀取圖片、縮小重新編碼後轉為 Base64；Base64 的大小即為實際上傳量
+        start = time.perf_counter()
+        mime_type, image_bytes = prepare_image_for_upload(img_full_path)
+        encode_start = time.perf_counter()
+        self.metrics.record("image_prepare", encode_start - start, nbytes=len(image_bytes))
+        base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        self.metrics.record("base64_encode", time.perf_counter() - encode_start, nbytes=len(base64_image))
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:{mime_type};base64,{base64_image}"
+            },
+        }
+
+    def _generate_alt_text(self, img_full_path, content_hash, check_cache=True):
+        """在執行緒池中為單張圖片產生 alt 敘述，失敗時回傳錯誤訊息作為 alt。"""
+        if content_hash is None:
+            return "錯誤：找不到圖片檔案"
+        self.cancel_token.raise_if_cancelled()
+
+        try:
+            # 相同圖片內容 (且 prompt、模型相同) 直接使用快取，不呼叫 AI
+            cache_key = AltTextCache.make_key(content_hash)
+            if self.cache and check_cache:
+                cached_alt = self.cache.get(cache_key)
+                if cached_alt is not None:
+                    return cached_alt
+
+            chat_completion = self._create_completion(
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": ALT_PROMPT_TEXT},
+                            self._image_content_part(img_full_path),
+                        ],
+                    }
+                ],
+                model=GROQ_MODEL,
+            )
+            alt_text = chat_completion.choices[0].message.content.strip()
+            if self.cache:
+                self.cache.put(cache_key, alt_text)
+            return alt_text
+
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            if self.cancel_token.cancelled: # 取消時連線被關閉等錯誤不需回報
+                raise OperationCancelled() from e
+            error_msg = f"圖片 '{os.path.basename(img_full_path)}' 處理失敗: {e}"
+            self.on_error(error_msg)
+            return f"AI生成失敗: {e}"
+
+    def _create_completion(self, estimated_tokens=ESTIMATED_TOKENS_PER_REQUEST, **kwargs):
+        """
+        依 RPM/TPM 權杖桶節流後送出請求。遇到 429 或暫時性錯誤時，
+        優先依 retry-after 標頭等待，否則以加入隨機抖動的指數退避重試。
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            with self.metrics.measure("rate_limit_wait"):
+                rate_limiter.acquire(estimated_tokens, self.cancel_token)
+            self.cancel_token.raise_if_cancelled()
+            start = time.perf_counter()
+            try:
+                chat_completion = self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                self.metrics.record("request", time.perf_counter() - start)
+                # 請求失敗時預估的 token 並未被使用
+                rate_limiter.record_usage(estimated_tokens, 0)
+                if attempt >= MAX_RETRIES or not is_retryable_error(e):
+                    raise
+                retry_after = get_retry_after_seconds(e)
+                if retry_after is not None:
+                    # 伺服器明確要求等待，所有請求一起暫停
+                    rate_limiter.block_for(retry_after)
+                    delay = retry_after + random.uniform(0, RETRY_BASE_DELAY)
+                else:
+                    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+                with self.metrics.measure("retry_wait"):
+                    self.cancel_token.sleep(delay)
+                continue
+
+            usage = getattr(chat_completion, 'usage', None)
+            total_tokens = usage.total_tokens if usage and usage.total_tokens else 0
+            self.metrics.record("request", time.perf_counter() - start, tokens=total_tokens)
+            if total_tokens:
+                rate_limiter.record_usage(estimated_tokens, total_tokens)
+            return chat_completion
@@ -1,27 +1,25 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
-import base64
-import mimetypes
+import time
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLabel, QFileDialog, QStackedWidget, QListWidget, QListWidgetItem, QLineEdit,
-    QProgressBar, QScrollArea, QTabWidget, QDialog, QMessageBox
+    QLabel, QFileDialog, QStackedWidget, QListView, QLineEdit, QAbstractItemView,
+    QStyledItemDelegate, QProgressBar, QTabWidget, QDialog, QMessageBox
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QObject
-from PyQt6.QtGui import QPixmap, QDragEnterEvent, QDropEvent, QIcon, QImage
+from PyQt6.QtCore import (
+    Qt, QThread, pyqtSignal, QSize, QRect, QEvent, QObject, QRunnable, QThreadPool, QBuffer, QIODevice,
+    QAbstractListModel, QModelIndex
+)
+from PyQt6.QtGui import QPixmap, QDragEnterEvent, QDropEvent, QIcon, QImage, QImageReader, QPainter, QColor, QPen
 
-from bs4 import BeautifulSoup
-from groq import Groq
+from alt_engine import (
+    MAX_CONCURRENT_REQUESTS, RUN_REPORT_DIR, AltGenerator, AltTextCache, CancellationToken, HtmlScanIndex, ResultJournal,
+    RunMetrics, ThumbnailDiskCache, client_manager, collect_html_files, iter_parse_html_files, write_alt_texts_batch
+)
 
-# ##############################################################################
-# ##                          請在此處填寫您的 API KEY                          ##
-# ##############################################################################
-# 前往 https://console.groq.com/keys 取得您的 API Key
-GROQ_API_KEY = "YOUR-KEY"
-# ##############################################################################
-# ##                                API KEY 結束                               ##
-# ##############################################################################
+# API Key、模型與 AI 請求相關設定請見 alt_engine.py
 
 # --- 色彩與樣式設定 ---
 class StyleConfig:
@@ -64,6 +62,14 @@ class StyleConfig:
                 color: {StyleConfig.PRIMARY_GRAY};
                 padding: 5px 15px;
             }}
+            QLabel#MetricsLabel {{
+                font-size: 12px;
+                color: {StyleConfig.PRIMARY_GRAY};
+                background-color: #f9f9f9;
+                border: 1px solid {StyleConfig.LIGHT_GRAY};
+                border-radius: 8px;
+                padding: 8px 12px;
+            }}
             QPushButton {{
                 font-size: 14px;
                 padding: 10px 20px;
@@ -132,7 +138,7 @@ class StyleConfig:
                 color: {StyleConfig.TEXT_DARK};
                 font-weight: bold;
             }}
-            QScrollArea {{
+            QListView {{
                 border: none;
             }}
         """
@@ -140,90 +146,242 @@ class StyleConfig:
 # --- AI Worker (執行緒) ---
 class GroqWorker(QThread):
     progress = pyqtSignal(int, str)
+    item_finished = pyqtSignal(int, int, str) # (job_index, item_index, alt_text)
     finished = pyqtSignal(list)
     error = pyqtSignal(str)
 
-    def __init__(self, images_to_process, html_path):
+    def __init__(self, jobs, max_workers=MAX_CONCURRENT_REQUESTS, journal=None, metrics=None):
+        """
+        jobs: [(html_path, images_to_process), ...]，每個 HTML 檔案為一個 job。
+        實際的處理流程在 alt_engine.AltGenerator，這裡只負責把回呼轉成 Qt 信號。
+        journal: 結果日誌 (ResultJournal)，上次中斷前已完成的圖片直接沿用。
+        metrics: 記錄各階段耗時的 RunMetrics。
+        """
         super().__init__()
-        self.images_to_process = images_to_process
-        self.html_path = html_path
-        self.client = None
+        self.jobs = jobs
+        self.max_workers = max(1, max_workers)
+        self.journal = journal
+        self.metrics = metrics
+        self.cancel_token = CancellationToken()
+
+    def cancel(self):
+        """要求停止產生：不再送出新的請求，進行中的請求最多等待 CANCEL_GRACE_PERIOD 秒，
+        已完成的結果仍會透過 finished 送出 (未完成的位置為 None)。"""
+        self.cancel_token.cancel()
 
     def run(self):
-        if not GROQ_API_KEY or GROQ_API_KEY == "YOUR_GROQ_API_KEY":
-            self.error.emit("錯誤：尚未設定 Groq API Key。")
+        generator = AltGenerator(
+            max_workers=self.max_workers,
+            on_progress=self.progress.emit,
+            on_item_finished=self.item_finished.emit,
+            on_error=self.error.emit,
+            journal=self.journal,
+            cancel_token=self.cancel_token,
+            metrics=self.metrics,
+        )
+        results = generator.run(self.jobs)
+        if results is not None:
+            self.finished.emit(results)
+
+# --- HTML 解析 Worker (執行緒) ---
+class HtmlParseWorker(QThread):
+    files_selected = pyqtSignal(list, int) # (要解析的檔案, 略過的未變更檔案數)，在解析前送出
+    file_parsed = pyqtSignal(str, list, str) # (file_path, images_to_process, 錯誤訊息)
+
+    def __init__(self, file_paths, scan_index=None, metrics=None):
+        """
+        在背景解析 HTML 檔案 (檔案多時由 alt_engine 分散到多個行程)，
+        每個檔案解析完成就送出 file_parsed，GUI 不必等所有檔案都解析完。
+        解析前先以 scan_index 略過上次掃描後未變更且沒有缺少 alt 的檔案 (需要 stat 與雜湊，
+        同樣在背景執行)，解析結果也會記錄到 scan_index；解析時間記錄到 metrics。
+        """
+        super().__init__()
+        self.file_paths = file_paths
+        self.scan_index = scan_index
+        self.metrics = metrics
+
+    def run(self):
+        file_paths, unchanged_files = self.file_paths, []
+        if self.scan_index:
+            file_paths, unchanged_files = self.scan_index.split_unchanged(file_paths)
+        if self.isInterruptionRequested():
             return
+        self.files_selected.emit(file_paths, len(unchanged_files))
+        parsed = iter_parse_html_files(file_paths, scan_index=self.scan_index, metrics=self.metrics)
+        try:
+            for file_path, images_to_process, error in parsed:
+                if self.isInterruptionRequested():
+                    break
+                self.file_parsed.emit(file_path, images_to_process, error or "")
+        finally:
+            parsed.close() # 中斷時取消尚未開始解析的檔案
+
+# --- 儲存 Worker (執行緒) ---
+class SaveWorker(QThread):
+    progress = pyqtSignal(int, str)
+    saved = pyqtSignal(list) # [(file_path, 錯誤訊息或 None), ...]
+    error = pyqtSignal(str) # 不影響儲存結果的錯誤 (例如結果日誌無法更新)
+
+    def __init__(self, jobs, journal=None, metrics=None):
+        """
+        jobs: [(file_path, [(ImgTag, alt), ...]), ...]
+        在背景依序寫回 HTML 檔案 (寫入暫存檔、同步到磁碟後再取代原檔)，儲存大量檔案時 GUI 仍可回應。
+        寫回成功的檔案會從結果日誌 (journal) 中移除；寫入時間記錄到 metrics。
+        """
+        super().__init__()
+        self.jobs = jobs
+        self.journal = journal
+        self.metrics = metrics
 
+    def run(self):
+        def on_file_written(done, total, file_path, error):
+            self.progress.emit(done * 100 // total, f"正在儲存 {os.path.basename(file_path)} ({done}/{total})")
+
+        results = write_alt_texts_batch(self.jobs, on_file_written=on_file_written, metrics=self.metrics)
+        if self.journal:
+            try:
+                self.journal.discard_files([file_path for file_path, error in results if error is None])
+            except OSError as e:
+                self.error.emit(f"結果日誌更新失敗: {e}")
+        self.saved.emit(results)
+
+# --- 縮圖設定 ---
+THUMBNAIL_SIZE = 100 # 列表中縮圖的邊長
+THUMBNAIL_LOADER_THREADS = 4 # 背景解碼縮圖的執行緒數
+THUMBNAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024 # 記憶體中縮圖快取的上限
+
+# --- 縮圖快取與背景載入 ---
+class ThumbnailMemoryCache:
+    """以 (路徑, 修改時間) 為鍵、依位元組數上限淘汰最久未使用項目的 QPixmap 快取 (LRU)。"""
+    def __init__(self, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items = OrderedDict() # {key: (pixmap, byte_size)}
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, pixmap):
+        if key in self._items:
+            self.total_bytes -= self._items.pop(key)[1]
+        byte_size = pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+        self._items[key] = (pixmap, byte_size)
+        self.total_bytes += byte_size
+        while self.total_bytes > self.max_bytes and len(self._items) > 1:
+            _, (_, evicted_size) = self._items.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+class _ThumbnailSignals(QObject):
+    loaded = pyqtSignal(object, QImage) # (key, image)
+
+class _ThumbnailTask(QRunnable):
+    """
+    在執行緒池中解碼並縮小圖片 (QImage 可以在非 GUI 執行緒使用，QPixmap 不行)。
+    先查磁碟快取，沒有時才解碼原圖，並把縮圖寫回磁碟快取供下次開啟使用。
+    """
+    def __init__(self, key, path, size, signals, disk_cache):
+        super().__init__()
+        self.key = key
+        self.path = path
+        self.size = size
+        self.signals = signals
+        self.disk_cache = disk_cache
+
+    def run(self):
+        if self.disk_cache:
+            data = self.disk_cache.get(self.path, self.size)
+            image = QImage.fromData(data) if data is not None else QImage()
+            if not image.isNull():
+                self.signals.loaded.emit(self.key, image)
+                return
+
+        image = self._decode()
+        if not image.isNull() and self.disk_cache:
+            buffer = QBuffer()
+            buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+            image.save(buffer, "PNG")
+            self.disk_cache.put(self.path, self.size, bytes(buffer.data()))
+        self.signals.loaded.emit(self.key, image)
+
+    def _decode(self):
+        reader = QImageReader(self.path)
+        reader.setAutoTransform(True)
+        source_size = reader.size()
+        if source_size.isValid():
+            # JPEG 等格式可以直接以較小的尺寸解碼；多留一倍讓縮小後仍保持清晰
+            scaled_size = source_size.scaled(self.size * 2, self.size * 2, Qt.AspectRatioMode.KeepAspectRatio)
+            if scaled_size.width() < source_size.width():
+                reader.setScaledSize(scaled_size)
+        image = reader.read()
+        if not image.isNull():
+            image = image.scaled(self.size, self.size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        return image
+
+class ThumbnailLoader(QObject):
+    """
+    在背景執行緒池解碼縮圖，完成後於 GUI 執行緒呼叫 callback(pixmap)。
+    已載入的縮圖保存在記憶體 LRU 快取中，切換分頁或重新開啟時不必再解碼；
+    縮圖也會寫入磁碟快取，下次啟動程式開啟同一個網站時可直接讀取。
+    """
+    def __init__(self, size=THUMBNAIL_SIZE, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.cache = ThumbnailMemoryCache()
         try:
-            self.client = Groq(api_key=GROQ_API_KEY)
-        except Exception as e:
-            self.error.emit(f"API 客戶端初始化失敗: {e}")
-            return
-            
-        results = []
-        total_images = len(self.images_to_process)
+            self.disk_cache = ThumbnailDiskCache()
+        except OSError: # 快取資料夾無法建立時只使用記憶體快取
+            self.disk_cache = None
+        self._pending = {} # {key: [callback, ...]}
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(THUMBNAIL_LOADER_THREADS)
+        self._signals = _ThumbnailSignals(self)
+        self._signals.loaded.connect(self._on_loaded)
+
+    def cached(self, path):
+        """只查詢記憶體快取，不會觸發解碼；沒有時回傳 None。"""
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            return None
+        return self.cache.get(key)
 
-        for i, (tag, img_path) in enumerate(self.images_to_process):
-            self.progress.emit(int((i / total_images) * 100), f"正在處理圖片 {i+1}/{total_images}...")
-            
-            # 建立圖片的絕對路徑
-            if not os.path.isabs(img_path):
-                img_full_path = os.path.join(os.path.dirname(self.html_path), img_path)
-            else:
-                img_full_path = img_path
+    def request(self, path, callback):
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            callback(QPixmap())
+            return
 
-            if not os.path.exists(img_full_path):
-                alt_text = "錯誤：找不到圖片檔案"
-                results.append((tag, img_path, alt_text))
-                continue
+        pixmap = self.cache.get(key)
+        if pixmap is not None:
+            callback(pixmap)
+            return
 
+        if key in self._pending: # 同一張圖片已在解碼中，只需等待結果
+            self._pending[key].append(callback)
+            return
+        self._pending[key] = [callback]
+        self._pool.start(_ThumbnailTask(key, path, self.size, self._signals, self.disk_cache))
+
+    def cancel_pending(self):
+        """取消尚未開始解碼的工作 (例如清空分頁時)。"""
+        self._pool.clear()
+        self._pending.clear()
+
+    def _on_loaded(self, key, image):
+        callbacks = self._pending.pop(key, None)
+        pixmap = QPixmap.fromImage(image)
+        if not pixmap.isNull():
+            self.cache.put(key, pixmap)
+        for callback in callbacks or []:
             try:
-                # 讀取圖片並轉為 Base64
-                mime_type, _ = mimetypes.guess_type(img_full_path)
-                if not mime_type or not mime_type.startswith('image'):
-                    raise ValueError("不支援的檔案類型")
-
-                with open(img_full_path, "rb") as image_file:
-                    base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-
-                prompt_text = """
-## 任務與目的
-* 為這張圖片生成一段符合 WCAG 2.1 AA 級無障礙標準的 alt 敘述。
-* 這段敘述應該簡潔、準確地描述圖片的內容與功能。
-* 請直接輸出描述文字，不要包含 "alt=" 或任何額外的引號或標籤。
-
-## 範例
-* 好的範例: "一位穿著紅色外套的女士正在公園裡遛狗。"
-* 不好的範例: "圖片", "照片", "alt='女士遛狗'"
-"""
-                
-                chat_completion = self.client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": prompt_text},
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:{mime_type};base64,{base64_image}"
-                                    },
-                                },
-                            ],
-                        }
-                    ],
-                    model="llama3-70b-8192",
-                )
-                alt_text = chat_completion.choices[0].message.content.strip()
-                results.append((tag, img_path, alt_text))
-
-            except Exception as e:
-                error_msg = f"圖片 '{os.path.basename(img_path)}' 處理失敗: {e}"
-                self.error.emit(error_msg)
-                results.append((tag, img_path, f"AI生成失敗: {e}"))
-
-        self.progress.emit(100, "所有圖片處理完成！")
-        self.finished.emit(results)
+                callback(pixmap)
+            except RuntimeError: # 對應的 widget 已被刪除
+                pass
 
 # --- 圖片預覽 Dialog ---
 class ImagePreviewDialog(QDialog):
@@ -238,55 +396,284 @@ class ImagePreviewDialog(QDialog):
         self.layout.addWidget(self.label)
         self.setFixedSize(self.label.pixmap().size())
 
-# --- 列表中的自訂 Widget ---
-class ImageAltItemWidget(QWidget):
-    text_changed = pyqtSignal()
-    
-    def __init__(self, tag, image_path, html_path, alt_text="", parent=None):
+# --- 快取管理 Dialog ---
+class CacheManagerDialog(QDialog):
+    """顯示 alt 敘述快取、縮圖磁碟快取與掃描索引的統計資料，並提供清除功能。"""
+    def __init__(self, thumbnail_disk_cache, scan_index=None, result_journal=None, parent=None):
         super().__init__(parent)
-        self.tag = tag
-        self.image_path = image_path
-        self.html_path = html_path
-
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(5, 5, 5, 5)
+        self.setWindowTitle("快取管理")
+        self.setMinimumWidth(420)
+        self.thumbnail_disk_cache = thumbnail_disk_cache
+        self.scan_index = scan_index
+        self.result_journal = result_journal
+        self.layout = QVBoxLayout(self)
 
-        # 圖片預覽
-        self.image_label = QLabel()
-        self.image_label.setFixedSize(100, 100)
-        self.image_label.setStyleSheet("border: 1px solid #ccc; background-color: #f0f0f0;")
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        
-        if not os.path.isabs(image_path):
-            full_img_path = os.path.join(os.path.dirname(html_path), image_path)
+        self.stats_label = QLabel()
+        self.stats_label.setWordWrap(True)
+        self.layout.addWidget(self.stats_label)
+
+        button_layout = QHBoxLayout()
+        purge_thumbnails_btn = QPushButton("清除縮圖快取")
+        purge_thumbnails_btn.setObjectName("CancelButton")
+        purge_thumbnails_btn.clicked.connect(self.purge_thumbnails)
+        purge_thumbnails_btn.setEnabled(thumbnail_disk_cache is not None)
+        purge_alt_btn = QPushButton("清除 alt 快取")
+        purge_alt_btn.setObjectName("CancelButton")
+        purge_alt_btn.clicked.connect(self.purge_alt_texts)
+        purge_index_btn = QPushButton("清除掃描索引")
+        purge_index_btn.setObjectName("CancelButton")
+        purge_index_btn.setToolTip("清除後，下次會重新解析所有檔案 (包含未變更的檔案)")
+        purge_index_btn.clicked.connect(self.purge_scan_index)
+        purge_index_btn.setEnabled(scan_index is not None)
+        purge_journal_btn = QPushButton("清除結果日誌")
+        purge_journal_btn.setObjectName("CancelButton")
+        purge_journal_btn.setToolTip("清除後，自動模式中斷前已完成但尚未儲存的結果不會再被沿用")
+        purge_journal_btn.clicked.connect(self.purge_result_journal)
+        purge_journal_btn.setEnabled(result_journal is not None)
+        close_btn = QPushButton("關閉")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(purge_thumbnails_btn)
+        button_layout.addWidget(purge_alt_btn)
+        button_layout.addWidget(purge_index_btn)
+        button_layout.addWidget(purge_journal_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(close_btn)
+        self.layout.addLayout(button_layout)
+
+        self.refresh_stats()
+
+    def refresh_stats(self):
+        lines = []
+        try:
+            alt_cache = AltTextCache()
+            lines.append(f"alt 敘述快取：{alt_cache.entry_count()} 筆")
+            alt_cache.close()
+        except Exception as e:
+            lines.append(f"alt 敘述快取無法開啟: {e}")
+
+        if self.thumbnail_disk_cache:
+            stats = self.thumbnail_disk_cache.stats()
+            lines.append(
+                f"縮圖快取：{stats['entries']} 張，{stats['bytes'] / 1024 / 1024:.1f} MB "
+                f"/ 上限 {stats['max_bytes'] / 1024 / 1024:.0f} MB"
+            )
+            lines.append(f"本次執行縮圖快取命中 {stats['hits']} / 未命中 {stats['misses']}")
+            lines.append(f"位置：{stats['path']}")
         else:
-            full_img_path = image_path
+            lines.append("縮圖快取：無法使用")
 
-        self.pixmap = QPixmap(full_img_path)
-        if self.pixmap.isNull():
-            self.image_label.setText("圖片載入失敗")
+        if self.scan_index:
+            lines.append(f"掃描索引：{self.scan_index.entry_count()} 個檔案 (未變更且已完整的檔案會直接略過)")
         else:
-            self.image_label.setPixmap(self.pixmap.scaled(100, 100, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-        
-        self.image_label.mousePressEvent = self.show_full_image
-        layout.addWidget(self.image_label)
-
-        # ALT 輸入框
-        self.alt_input = QLineEdit()
-        self.alt_input.setPlaceholderText("請輸入此圖片的 ALT 敘述...")
-        self.alt_input.setText(alt_text)
-        self.alt_input.textChanged.connect(self.text_changed.emit)
-        layout.addWidget(self.alt_input)
-        
-        self.setLayout(layout)
+            lines.append("掃描索引：無法使用")
 
-    def show_full_image(self, event):
-        if not self.pixmap.isNull():
-            dialog = ImagePreviewDialog(self.pixmap, self)
-            dialog.exec()
+        if self.result_journal:
+            lines.append(f"結果日誌：{self.result_journal.entry_count()} 筆尚未儲存的自動模式結果")
+        self.stats_label.setText("\n".join(lines))
+
+    def purge_thumbnails(self):
+        self.thumbnail_disk_cache.purge()
+        self.refresh_stats()
+
+    def purge_alt_texts(self):
+        try:
+            alt_cache = AltTextCache()
+            alt_cache.purge()
+            alt_cache.close()
+        except Exception as e:
+            QMessageBox.critical(self, "錯誤", f"清除 alt 快取失敗: {e}")
+        self.refresh_stats()
+
+    def purge_scan_index(self):
+        self.scan_index.purge()
+        self.refresh_stats()
+
+    def purge_result_journal(self):
+        self.result_journal.purge()
+        self.refresh_stats()
+
+# --- 圖片列表 (Model / Delegate) ---
+ALT_INPUT_PLACEHOLDER = "請輸入此圖片的 ALT 敘述..."
+ITEM_MARGIN = 5 # 列表項目的內邊距
+ALT_INPUT_HEIGHT = 36 # ALT 輸入框的高度
+
+class ImageAltListModel(QAbstractListModel):
+    """
+    單一 HTML 檔案中待處理圖片的資料。
+    列表只會向 Model 查詢畫面上看得到的列，縮圖也在第一次被繪製時才要求背景載入，
+    因此頁面中有數千張圖片時，建立列表的時間與記憶體用量也不會隨之增加。
+    """
+    ImagePathRole = Qt.ItemDataRole.UserRole + 1 # 圖片完整路徑
+    PlaceholderRole = Qt.ItemDataRole.UserRole + 2 # ALT 輸入框的提示文字
+    ThumbnailFailedRole = Qt.ItemDataRole.UserRole + 3 # 縮圖是否載入失敗
+
+    def __init__(self, html_path, thumbnail_loader, parent=None):
+        super().__init__(parent)
+        self.html_path = html_path
+        self.thumbnail_loader = thumbnail_loader
+        # 每一列: {"tag", "path", "alt", "placeholder", "thumbnail": None / "loading" / "failed", "row"}
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def flags(self, index):
+        return super().flags(index) | Qt.ItemFlag.ItemIsEditable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return row["alt"]
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self._thumbnail(row)
+        if role == self.ImagePathRole:
+            return row["path"]
+        if role == self.PlaceholderRole:
+            return row["placeholder"]
+        if role == self.ThumbnailFailedRole:
+            return row["thumbnail"] == "failed"
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        row = self._rows[index.row()]
+        if row["alt"] != value:
+            row["alt"] = value
+            self.dataChanged.emit(index, index, [role])
+        return True
+
+    def _thumbnail(self, row):
+        # 縮圖本身只存在 ThumbnailLoader 的 LRU 快取中，被淘汰後再次捲動到這一列時會重新要求
+        if row["thumbnail"] == "failed":
+            return None
+        pixmap = self.thumbnail_loader.cached(row["path"])
+        if pixmap is None and row["thumbnail"] != "loading":
+            row["thumbnail"] = "loading"
+            self.thumbnail_loader.request(row["path"], lambda pixmap, row=row: self._on_thumbnail_loaded(row, pixmap))
+        return pixmap
+
+    def _on_thumbnail_loaded(self, row, pixmap):
+        row["thumbnail"] = "failed" if pixmap.isNull() else None
+        # 儲存後列表會被清空，過時的結果直接忽略
+        if row["row"] < len(self._rows) and self._rows[row["row"]] is row:
+            index = self.index(row["row"])
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def set_items(self, images_data, placeholder=ALT_INPUT_PLACEHOLDER):
+        """images_data 為 [(tag, src)]；alt 一律從空白開始，自動模式的結果由 set_alt_text() 填入。"""
+        html_dir = os.path.dirname(self.html_path)
+        rows = []
+        for tag, img_path in images_data:
+            full_img_path = img_path if os.path.isabs(img_path) else os.path.join(html_dir, img_path)
+            rows.append({"tag": tag, "path": full_img_path, "alt": "",
+                         "placeholder": placeholder, "thumbnail": None, "row": len(rows)})
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def set_alt_text(self, row_index, alt_text):
+        row = self._rows[row_index]
+        row["alt"] = alt_text
+        row["placeholder"] = ALT_INPUT_PLACEHOLDER
+        index = self.index(row_index)
+        self.dataChanged.emit(index, index)
+
+    def reset_placeholders(self, placeholder=ALT_INPUT_PLACEHOLDER):
+        """停止自動生成後，把仍顯示「AI 生成中...」的列改回一般提示文字，讓使用者手動填寫。"""
+        for row in self._rows:
+            row["placeholder"] = placeholder
+        if self._rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self._rows) - 1), [self.PlaceholderRole])
 
     def get_data(self):
-        return self.tag, self.alt_input.text()
+        return [(row["tag"], row["alt"]) for row in self._rows]
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self.endResetModel()
+
+class ImageAltItemDelegate(QStyledItemDelegate):
+    """
+    以繪製取代每列一個 widget：左側為縮圖，右側為 ALT 輸入框的外觀。
+    只有使用者正在編輯的那一列才會建立真正的 QLineEdit。
+    """
+    preview_requested = pyqtSignal(str) # 點擊縮圖時送出圖片完整路徑
+
+    def sizeHint(self, option, index):
+        return QSize(max(option.rect.width(), 200), THUMBNAIL_SIZE + ITEM_MARGIN * 2)
+
+    def _thumbnail_rect(self, item_rect):
+        return QRect(item_rect.left() + ITEM_MARGIN, item_rect.top() + ITEM_MARGIN, THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+
+    def _input_rect(self, item_rect):
+        left = item_rect.left() + THUMBNAIL_SIZE + ITEM_MARGIN * 3
+        top = item_rect.top() + (item_rect.height() - ALT_INPUT_HEIGHT) // 2
+        return QRect(left, top, item_rect.right() - ITEM_MARGIN - left, ALT_INPUT_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setFont(option.font)
+
+        # 縮圖 (尚未載入完成前先顯示佔位文字)
+        thumbnail_rect = self._thumbnail_rect(option.rect)
+        painter.fillRect(thumbnail_rect, QColor("#f0f0f0"))
+        painter.setPen(QColor("#ccc"))
+        painter.drawRect(thumbnail_rect.adjusted(0, 0, -1, -1))
+        pixmap = index.data(Qt.ItemDataRole.DecorationRole)
+        if pixmap is not None and not pixmap.isNull():
+            x = thumbnail_rect.left() + (THUMBNAIL_SIZE - pixmap.width()) // 2
+            y = thumbnail_rect.top() + (THUMBNAIL_SIZE - pixmap.height()) // 2
+            painter.drawPixmap(x, y, pixmap)
+        else:
+            failed = index.data(ImageAltListModel.ThumbnailFailedRole)
+            painter.setPen(QColor(StyleConfig.PRIMARY_GRAY))
+            painter.drawText(thumbnail_rect, Qt.AlignmentFlag.AlignCenter, "圖片載入失敗" if failed else "載入中...")
+
+        # ALT 輸入框外觀
+        input_rect = self._input_rect(option.rect)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(QColor(StyleConfig.LIGHT_GRAY)))
+        painter.setBrush(QColor(StyleConfig.MAIN_BG))
+        painter.drawRoundedRect(input_rect.adjusted(0, 0, -1, -1), 5, 5)
+        text_rect = input_rect.adjusted(9, 0, -9, 0)
+        alt_text = index.data(Qt.ItemDataRole.DisplayRole)
+        if alt_text:
+            painter.setPen(QColor(StyleConfig.TEXT_DARK))
+        else:
+            alt_text = index.data(ImageAltListModel.PlaceholderRole)
+            painter.setPen(QColor(StyleConfig.SECONDARY_GRAY))
+        alt_text = painter.fontMetrics().elidedText(alt_text, Qt.TextElideMode.ElideRight, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, alt_text)
+        painter.restore()
+
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        # 每打一個字就寫回 Model，儲存按鈕與其他檢查不必等編輯框失去焦點
+        editor.textChanged.connect(lambda: self.commitData.emit(editor))
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setPlaceholderText(index.data(ImageAltListModel.PlaceholderRole))
+        alt_text = index.data(Qt.ItemDataRole.EditRole)
+        if editor.text() != alt_text: # 避免輸入中游標被重設
+            editor.setText(alt_text)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.text(), Qt.ItemDataRole.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(self._input_rect(option.rect))
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            if self._thumbnail_rect(option.rect).contains(event.position().toPoint()):
+                self.preview_requested.emit(index.data(ImageAltListModel.ImagePathRole))
+                return True
+        return super().editorEvent(event, model, option, index)
 
 # --- 檔案拖曳區 Widget ---
 class DropArea(QLabel):
@@ -372,6 +759,11 @@ class HomePageWidget(QWidget):
         self.confirm_btn.setEnabled(False)
         layout.addWidget(self.confirm_btn, alignment=Qt.AlignmentFlag.AlignCenter)
 
+        # 快取管理
+        self.cache_btn = QPushButton("快取管理")
+        self.cache_btn.setObjectName("SelectFileButton")
+        layout.addWidget(self.cache_btn, alignment=Qt.AlignmentFlag.AlignRight)
+
     def open_file_dialog(self):
         # 允許使用者同時選擇檔案和資料夾
         dialog = QFileDialog(self)
@@ -389,20 +781,13 @@ class HomePageWidget(QWidget):
                 self.handle_files([dir_path])
 
     def handle_files(self, paths):
-        html_files = []
-        for path in paths:
-            if os.path.isdir(path):
-                for root, _, files in os.walk(path):
-                    for file in files:
-                        if file.lower().endswith(('.html', '.htm')):
-                            html_files.append(os.path.join(root, file))
-            elif os.path.isfile(path) and path.lower().endswith(('.html', '.htm')):
-                html_files.append(path)
+        html_files = collect_html_files(paths)
         
         if not html_files:
             QMessageBox.warning(self, "格式錯誤", "您拖曳或選擇的項目中不包含任何有效的 HTML 檔案 (.html, .htm)。")
             return
 
+        # 未變更檔案的判斷需要讀取檔案，交給編輯頁面的背景解析執行緒處理
         self.selected_files = html_files
         if len(self.selected_files) > 1:
             self.file_list_label.setText(f"已選擇 {len(self.selected_files)} 個檔案")
@@ -437,13 +822,25 @@ class HomePageWidget(QWidget):
 class EditPageWidget(QWidget):
     back_to_home = pyqtSignal()
     
-    def __init__(self, parent=None):
+    def __init__(self, scan_index=None, parent=None):
         super().__init__(parent)
+        self.scan_index = scan_index
         self.files = []
         self.mode = ""
-        self.html_soups = {} # {filepath: BeautifulSoup object}
-        self.all_list_items = {} # {tab_index: [ImageAltItemWidget]}
+        self.list_models = {} # {tab_index: ImageAltListModel}
+        self.tabs_with_items = set() # 還有未儲存項目的分頁，輸入文字時不需重新檢查
         self.worker = None
+        self.parse_worker = None
+        self.save_worker = None
+        self.file_tabs = {} # {file_path: [tab_index, ...]}，解析結果依檔案送回對應分頁
+        self.run_metrics = None # 目前這次載入的各階段耗時 (RunMetrics)，處理完成後輸出報告
+        self.run_report_path = None
+        self.skipped_count = 0 # 背景執行緒略過的未變更檔案數
+        self.thumbnail_loader = ThumbnailLoader(parent=self) # 縮圖快取在切換分頁、重新載入時保留
+        try:
+            self.result_journal = ResultJournal() # 自動模式中斷後重新執行時，沿用已完成的結果
+        except OSError:
+            self.result_journal = None
         self._setup_ui()
 
     def _setup_ui(self):
@@ -464,6 +861,14 @@ class EditPageWidget(QWidget):
         self.error_label.setStyleSheet(f"color: {StyleConfig.CANCEL_RED};")
         self.error_label.setVisible(False)
         self.main_layout.addWidget(self.error_label)
+
+        # 效能摘要 (處理完成後顯示)
+        self.metrics_label = QLabel("")
+        self.metrics_label.setObjectName("MetricsLabel")
+        self.metrics_label.setWordWrap(True)
+        self.metrics_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.metrics_label.setVisible(False)
+        self.main_layout.addWidget(self.metrics_label)
         
         # 分頁
         self.tab_widget = QTabWidget()
@@ -480,7 +885,7 @@ class EditPageWidget(QWidget):
         
         self.cancel_btn = QPushButton("取消")
         self.cancel_btn.setObjectName("CancelButton")
-        self.cancel_btn.clicked.connect(self.go_back)
+        self.cancel_btn.clicked.connect(self.on_cancel_clicked)
 
         bottom_layout.addWidget(self.cancel_btn)
         bottom_layout.addWidget(self.confirm_all_btn)
@@ -490,16 +895,19 @@ class EditPageWidget(QWidget):
         self.reset_state()
         self.files = files
         self.mode = mode
+        self.run_metrics = RunMetrics()
+        self.run_image_count = 0
+        self.load_started = time.perf_counter()
+        self.run_report_path = os.path.join(
+            RUN_REPORT_DIR, time.strftime("run_%Y%m%d_%H%M%S.json", time.localtime(self.run_metrics.started_at)))
         title_prefix = "手動生成 ALT" if mode == "manual" else "自動生成 ALT"
         self.title_label.setText(title_prefix)
 
         if not self.files:
             self.go_back()
             return
-            
-        for file_path in self.files:
-            self._add_tab_for_file(file_path)
 
+        # 分頁在背景執行緒略過未變更的檔案後才建立 (見 on_files_selected)
         if self.mode == "auto":
             self.process_files_auto()
         else: # manual
@@ -510,153 +918,212 @@ class EditPageWidget(QWidget):
         tab_content_widget = QWidget()
         tab_layout = QVBoxLayout(tab_content_widget)
 
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        
-        list_container = QWidget()
-        self.list_layout = QVBoxLayout(list_container)
-        self.list_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-
-        scroll_area.setWidget(list_container)
-        tab_layout.addWidget(scroll_area)
+        # 以 Model / View 呈現圖片列表，只有看得到的列會被繪製、載入縮圖
+        model = ImageAltListModel(file_path, self.thumbnail_loader, tab_content_widget)
+        delegate = ImageAltItemDelegate(tab_content_widget)
+        delegate.preview_requested.connect(self.show_full_image)
+
+        list_view = QListView()
+        list_view.setModel(model)
+        list_view.setItemDelegate(delegate)
+        list_view.setUniformItemSizes(True) # 所有列同高，捲動時不必逐列計算大小
+        list_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        list_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        list_view.setEditTriggers(
+            QAbstractItemView.EditTrigger.CurrentChanged | QAbstractItemView.EditTrigger.SelectedClicked
+            | QAbstractItemView.EditTrigger.EditKeyPressed | QAbstractItemView.EditTrigger.AnyKeyPressed
+        )
+        tab_layout.addWidget(list_view)
 
         # "確認修改此檔案" 按鈕
         if len(self.files) > 1:
             confirm_this_btn = QPushButton("確認修改此檔案")
             confirm_this_btn.setObjectName("ConfirmButton")
             confirm_this_btn.setEnabled(False)
-            # 使用 lambda 捕捉當前的 tab_content_widget
-            confirm_this_btn.clicked.connect(lambda ch, w=list_container, p=file_path, b=confirm_this_btn: self.save_single_file(w, p, b))
+            # 使用 lambda 捕捉當前分頁的 model
+            confirm_this_btn.clicked.connect(lambda ch, m=model, p=file_path, b=confirm_this_btn: self.save_single_file(m, p, b))
             tab_layout.addWidget(confirm_this_btn, alignment=Qt.AlignmentFlag.AlignRight)
-            
-            # 將按鈕與其對應的列表容器關聯起來
-            list_container.setProperty("confirm_button", confirm_this_btn)
+
+            # 將按鈕與其對應的分頁關聯起來
+            tab_content_widget.setProperty("confirm_button", confirm_this_btn)
 
         self.tab_widget.addTab(tab_content_widget, tab_name)
         
-        # 存儲佈局以便後續添加項目
+        # 存儲 model 以便後續填入項目
         tab_index = self.tab_widget.indexOf(tab_content_widget)
-        self.all_list_items[tab_index] = []
-        tab_content_widget.setProperty("list_layout", self.list_layout)
+        self.list_models[tab_index] = model
+        self.file_tabs.setdefault(file_path, []).append(tab_index)
+        # 儲存按鈕只取決於分頁中是否有項目，只在填入或清空列表時更新，輸入文字時不必檢查
+        model.modelReset.connect(lambda tab_index=tab_index: self.on_tab_items_changed(tab_index))
+        tab_content_widget.setProperty("list_view", list_view)
         tab_content_widget.setProperty("file_path", file_path)
 
 
     def process_files_manual(self):
-        for i in range(self.tab_widget.count()):
-            tab = self.tab_widget.widget(i)
-            file_path = tab.property("file_path")
-            images_to_process = self._parse_html(file_path)
-            
-            if images_to_process:
-                self.populate_ui_for_tab(i, images_to_process)
-            else:
-                 self._handle_no_images_found(i)
+        self._start_parsing()
 
     def process_files_auto(self):
         # 暫時禁用所有互動
         self.tab_widget.setEnabled(False)
         self.confirm_all_btn.setEnabled(False)
         self.cancel_btn.setEnabled(False)
-        
-        self.progress_bar.setValue(0)
-        self.progress_bar.setVisible(True)
         self.error_label.setVisible(False)
         self.error_label.setText("")
 
-        # 這裡我們一次只處理一個檔案的AI請求來簡化流程
-        # 如果需要並行處理，需要更複雜的執行緒管理
-        self.current_auto_processing_tab = 0
-        self._start_next_auto_job()
+        # 先解析所有分頁，把每個檔案的圖片集中成同一個工作佇列，
+        # 交給單一 GroqWorker 的共用執行緒池處理，結果再依 job 送回對應分頁
+        self.auto_jobs = [] # [(file_path, images_to_process), ...]
+        self.auto_job_tabs = [] # {job_index: tab_index}
+        self._start_parsing()
+
+    def _start_parsing(self):
+        """在背景解析所有分頁的 HTML 檔案，解析期間 GUI 保持可操作。"""
+        self.parsed_count = 0
+        self.skipped_count = 0
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("正在檢查檔案是否變更...")
+        self.progress_bar.setVisible(True)
+
+        self.parse_worker = HtmlParseWorker(list(dict.fromkeys(self.files)), self.scan_index, self.run_metrics)
+        self.parse_worker.files_selected.connect(self.on_files_selected)
+        self.parse_worker.file_parsed.connect(self.on_file_parsed)
+        self.parse_worker.finished.connect(self.on_parsing_finished)
+        self.parse_worker.start()
+
+    def on_files_selected(self, files_to_scan, skipped_count):
+        if self.sender() is not self.parse_worker:
+            return
+        # 只為需要解析的檔案建立分頁；未變更且已完整的檔案不顯示
+        self.skipped_count = skipped_count
+        files_to_scan = set(files_to_scan)
+        self.files = [file_path for file_path in self.files if file_path in files_to_scan]
+        for file_path in self.files:
+            self._add_tab_for_file(file_path)
+        self.progress_bar.setFormat(f"正在解析 HTML 檔案 (0/{len(self.file_tabs)}){self._skipped_text()}")
 
-    def _start_next_auto_job(self):
-        if self.current_auto_processing_tab >= self.tab_widget.count():
-            # 所有檔案處理完成
+    def _skipped_text(self):
+        return f"，略過 {self.skipped_count} 個未變更且已完整的檔案" if self.skipped_count else ""
+
+    def on_file_parsed(self, file_path, images_to_process, error):
+        if self.sender() is not self.parse_worker: # 已返回首頁或重新載入，略過舊的結果
+            return
+        if error:
+            self.show_error(f"解析檔案 {os.path.basename(file_path)} 失敗: {error}")
+        self.run_image_count += len(images_to_process) * len(self.file_tabs.get(file_path, []))
+
+        for tab_index in self.file_tabs.get(file_path, []):
+            if not images_to_process:
+                self._handle_no_images_found(tab_index)
+                continue
+            with self.run_metrics.measure("populate_ui"):
+                if self.mode == "auto":
+                    self.populate_ui_for_tab(tab_index, images_to_process, is_pending=True)
+                    self.auto_jobs.append((file_path, images_to_process))
+                    self.auto_job_tabs.append(tab_index)
+                else:
+                    self.populate_ui_for_tab(tab_index, images_to_process)
+
+        self.parsed_count += 1
+        self.progress_bar.setValue(self.parsed_count * 100 // len(self.file_tabs))
+        self.progress_bar.setFormat(f"正在解析 HTML 檔案 ({self.parsed_count}/{len(self.file_tabs)}){self._skipped_text()}")
+
+    def on_parsing_finished(self):
+        if self.sender() is not self.parse_worker:
+            return
+        self.parse_worker = None
+        self.run_metrics.record("page_load", time.perf_counter() - self.load_started)
+        if not self.file_tabs and self.skipped_count:
             self.progress_bar.setVisible(False)
             self.tab_widget.setEnabled(True)
             self.cancel_btn.setEnabled(True)
-            # 檢查是否有可儲存的項目
-            self.check_any_item_changed()
+            QMessageBox.information(self, "無需處理", f"所選的 {self.skipped_count} 個檔案自上次掃描後都未變更，且所有圖片均已包含 ALT 敘述。")
+            self.back_to_home.emit()
             return
-            
-        tab_index = self.current_auto_processing_tab
-        tab = self.tab_widget.widget(tab_index)
-        file_path = tab.property("file_path")
-        self.tab_widget.setCurrentIndex(tab_index)
-
-        images_to_process = self._parse_html(file_path)
+        if self.mode == "auto":
+            self._start_auto_generation()
+        else:
+            self.progress_bar.setVisible(False)
+            self._show_run_summary()
 
-        if not images_to_process:
-            self._handle_no_images_found(tab_index)
-            self.current_auto_processing_tab += 1
-            self._start_next_auto_job()
+    def _start_auto_generation(self):
+        # 建立項目時會啟用儲存按鈕，處理完成前先保持禁用
+        self.confirm_all_btn.setEnabled(False)
+        if not self.auto_jobs:
+            self._finish_auto_processing()
             return
 
-        self.worker = GroqWorker(images_to_process, file_path)
+        self.progress_bar.setValue(0)
+        # 生成期間取消按鈕改為停止生成，已完成的結果會保留
+        self.cancel_btn.setText("停止生成")
+        self.cancel_btn.setEnabled(True)
+        self.worker = GroqWorker(self.auto_jobs, journal=self.result_journal, metrics=self.run_metrics)
         self.worker.progress.connect(self.update_progress)
         self.worker.error.connect(self.show_error)
+        self.worker.item_finished.connect(self.on_auto_item_finished)
         self.worker.finished.connect(self.on_auto_finished)
         self.worker.start()
 
+    def on_auto_item_finished(self, job_index, item_index, alt_text):
+        if self.sender() is not self.worker: # 已返回首頁或重新載入，略過舊的結果
+            return
+        tab_index = self.auto_job_tabs[job_index]
+        self.list_models[tab_index].set_alt_text(item_index, alt_text)
+
     def on_auto_finished(self, results):
-        tab_index = self.current_auto_processing_tab
-        # 將結果轉換為與手動模式相同的格式
-        processed_data = [(tag, img_path, alt) for tag, img_path, alt in results]
-        self.populate_ui_for_tab(tab_index, processed_data, is_auto=True)
-        
-        self.current_auto_processing_tab += 1
-        self._start_next_auto_job()
+        if self.sender() is not self.worker:
+            return
+        if self.worker.cancel_token.cancelled:
+            # 未完成的圖片改回一般提示文字，留待手動填寫或下次重新生成 (已完成的結果已記錄在結果日誌)
+            for tab_index in self.auto_job_tabs:
+                self.list_models[tab_index].reset_placeholders()
+        self._finish_auto_processing()
+
+    def on_cancel_clicked(self):
+        if self.worker and self.worker.isRunning():
+            self.stop_auto_generation()
+        else:
+            self.go_back()
+
+    def stop_auto_generation(self):
+        self.worker.cancel()
+        self.cancel_btn.setEnabled(False)
+        self.progress_bar.setFormat("正在停止，等待進行中的請求完成...")
+
+    def _finish_auto_processing(self):
+        # 所有檔案處理完成
+        self.progress_bar.setVisible(False)
+        self.tab_widget.setEnabled(True)
+        self.cancel_btn.setText("取消")
+        self.cancel_btn.setEnabled(True)
+        self._show_run_summary()
+        # 檢查是否有可儲存的項目
+        self.check_any_item_changed()
 
-    def _parse_html(self, file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                soup = BeautifulSoup(f, 'html.parser')
-                self.html_soups[file_path] = soup
-            
-            images_to_process = []
-            img_tags = soup.find_all('img')
-            for tag in img_tags:
-                alt = tag.get('alt', None)
-                if alt is None or alt.strip() == "":
-                    src = tag.get('src')
-                    if src:
-                        images_to_process.append((tag, src))
-            return images_to_process
-        except Exception as e:
-            self.show_error(f"解析檔案 {os.path.basename(file_path)} 失敗: {e}")
-            return []
-    
     def _handle_no_images_found(self, tab_index):
         tab = self.tab_widget.widget(tab_index)
-        list_layout = tab.property("list_layout")
+        list_view = tab.property("list_view")
         no_img_label = QLabel("此檔案中所有圖片均符合標準或已包含 ALT 敘述。")
         no_img_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        list_layout.addWidget(no_img_label)
+        list_view.setVisible(False)
+        tab.layout().insertWidget(0, no_img_label)
         
         # 禁用單檔儲存按鈕
-        confirm_this_btn = tab.findChild(QPushButton, "ConfirmButton")
+        confirm_this_btn = tab.property("confirm_button")
         if confirm_this_btn:
             confirm_this_btn.setEnabled(False)
 
 
-    def populate_ui_for_tab(self, tab_index, images_data, is_auto=False):
-        tab = self.tab_widget.widget(tab_index)
-        list_layout = tab.property("list_layout")
-        file_path = tab.property("file_path")
-
-        for item_data in images_data:
-            if is_auto:
-                tag, img_path, alt_text = item_data
-            else:
-                tag, img_path = item_data
-                alt_text = ""
+    def populate_ui_for_tab(self, tab_index, images_data, is_pending=False):
+        # 自動模式下先建立項目，AI 結果送達時再填入
+        placeholder = "AI 生成中..." if is_pending else ALT_INPUT_PLACEHOLDER
+        self.list_models[tab_index].set_items(images_data, placeholder=placeholder)
 
-            item_widget = ImageAltItemWidget(tag, img_path, file_path, alt_text)
-            item_widget.text_changed.connect(self.check_any_item_changed)
-            
-            list_layout.addWidget(item_widget)
-            self.all_list_items[tab_index].append(item_widget)
-        
-        self.check_any_item_changed()
+    def show_full_image(self, image_path):
+        # 原圖只在使用者點擊縮圖時才載入
+        pixmap = QPixmap(image_path)
+        if not pixmap.isNull():
+            dialog = ImagePreviewDialog(pixmap, self)
+            dialog.exec()
 
     def update_progress(self, value, text):
         self.progress_bar.setValue(value)
@@ -667,86 +1134,88 @@ class EditPageWidget(QWidget):
         current_text = self.error_label.text()
         self.error_label.setText(current_text + message + "\n")
 
-    def check_any_item_changed(self):
-        any_items_exist = False
-        
-        # 檢查並更新 "確認修改此檔案" 按鈕
-        for i in range(self.tab_widget.count()):
-            tab = self.tab_widget.widget(i)
-            list_container = tab.findChild(QWidget)
-            if list_container:
-                confirm_btn = list_container.property("confirm_button")
-                if confirm_btn:
-                    # 如果該分頁下有任何列表項，則啟用按鈕
-                    if len(self.all_list_items.get(i, [])) > 0:
-                        confirm_btn.setEnabled(True)
-                        any_items_exist = True
-                    else:
-                        confirm_btn.setEnabled(False)
-
-        # 檢查並更新 "確認修改全部" 按鈕
-        # 如果任何一個分頁有列表項，就啟用 "確認修改全部"
-        if any(len(items) > 0 for items in self.all_list_items.values()):
-             self.confirm_all_btn.setEnabled(True)
+    def on_tab_items_changed(self, tab_index):
+        has_items = self.list_models[tab_index].rowCount() > 0
+        if has_items:
+            self.tabs_with_items.add(tab_index)
         else:
-             self.confirm_all_btn.setEnabled(False)
+            self.tabs_with_items.discard(tab_index)
 
-    def save_single_file(self, list_container, file_path, button):
-        tab_index = self.tab_widget.currentIndex()
-        item_widgets = self.all_list_items.get(tab_index, [])
-        
-        if not item_widgets:
-            return
+        # 如果該分頁下有任何列表項，則啟用 "確認修改此檔案" 按鈕
+        confirm_btn = self.tab_widget.widget(tab_index).property("confirm_button")
+        if confirm_btn:
+            confirm_btn.setEnabled(has_items)
 
-        soup = self.html_soups.get(file_path)
-        if not soup:
-            QMessageBox.critical(self, "錯誤", f"找不到檔案 {os.path.basename(file_path)} 的解析資料。")
-            return
-            
-        for item in item_widgets:
-            tag, alt_text = item.get_data()
-            tag['alt'] = alt_text
+        # 如果任何一個分頁有列表項，就啟用 "確認修改全部"
+        self.confirm_all_btn.setEnabled(bool(self.tabs_with_items))
 
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(str(soup))
-            
-            # 清空列表
-            for item in reversed(item_widgets):
-                item.deleteLater()
-            self.all_list_items[tab_index].clear()
-            
-            QMessageBox.information(self, "成功", f"檔案 {os.path.basename(file_path)} 已成功更新。")
-            button.setEnabled(False)
-            self.check_any_item_changed()
+    def check_any_item_changed(self):
+        for tab_index in self.list_models:
+            self.on_tab_items_changed(tab_index)
 
-        except Exception as e:
-            QMessageBox.critical(self, "儲存失敗", f"寫入檔案 {os.path.basename(file_path)} 時發生錯誤: {e}")
+    def save_single_file(self, model, file_path, button):
+        items = model.get_data()
+        
+        if not items:
+            return
+
+        self._start_saving([(file_path, items, model)], single_file=True)
 
     def save_all_files(self):
-        error_files = []
-        success_count = 0
-        
+        jobs = []
         for i in range(self.tab_widget.count()):
             file_path = self.tab_widget.widget(i).property("file_path")
-            item_widgets = self.all_list_items.get(i, [])
-            soup = self.html_soups.get(file_path)
-            
-            if not soup or not item_widgets:
-                continue
+            model = self.list_models.get(i)
+            items = model.get_data() if model else []
+            if items:
+                jobs.append((file_path, items, model))
 
-            for item in item_widgets:
-                tag, alt_text = item.get_data()
-                # 在 soup 物件中找到對應的 tag 並修改
-                # 由於 tag 物件是可變的，之前的修改應該已經生效
-                tag['alt'] = alt_text
+        self._start_saving(jobs, single_file=False)
 
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(str(soup))
+    def _start_saving(self, jobs, single_file):
+        """jobs: [(file_path, items, model), ...]，在背景寫回檔案，寫入期間暫停編輯。"""
+        self.save_jobs = jobs
+        self.save_single_file_mode = single_file
+        self.tab_widget.setEnabled(False)
+        self.confirm_all_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("正在儲存...")
+        self.progress_bar.setVisible(True)
+
+        self.save_worker = SaveWorker([(file_path, items) for file_path, items, _ in jobs], self.result_journal,
+                                      self.run_metrics)
+        self.save_worker.progress.connect(self.update_progress)
+        self.save_worker.error.connect(self.show_error)
+        self.save_worker.saved.connect(self.on_save_finished)
+        self.save_worker.start()
+
+    def on_save_finished(self, results):
+        if self.sender() is not self.save_worker: # 已返回首頁或重新載入
+            return
+        self.save_worker = None
+        self.progress_bar.setVisible(False)
+        self.tab_widget.setEnabled(True)
+        self.cancel_btn.setEnabled(True)
+        self._show_run_summary() # 加入寫回的耗時，更新報告
+
+        error_files = []
+        success_count = 0
+        for (file_path, _, model), (_, error) in zip(self.save_jobs, results):
+            if error:
+                error_files.append(f"{os.path.basename(file_path)}: {error}")
+            else:
+                model.clear() # 清空列表，同時更新儲存按鈕
                 success_count += 1
-            except Exception as e:
-                error_files.append(f"{os.path.basename(file_path)}: {e}")
+        self.check_any_item_changed()
+
+        if self.save_single_file_mode:
+            file_path = self.save_jobs[0][0]
+            if error_files:
+                QMessageBox.critical(self, "儲存失敗", f"寫入檔案 {os.path.basename(file_path)} 時發生錯誤: {results[0][1]}")
+            else:
+                QMessageBox.information(self, "成功", f"檔案 {os.path.basename(file_path)} 已成功更新。")
+            return
 
         if error_files:
             QMessageBox.warning(self, "部分儲存失敗", f"成功儲存 {success_count} 個檔案。\n以下檔案儲存失敗：\n" + "\n".join(error_files))
@@ -755,31 +1224,85 @@ class EditPageWidget(QWidget):
             
         self.go_back()
 
+    def _show_run_summary(self):
+        """在摘要面板顯示各階段耗時，並輸出 JSON 報告 (同一次載入的報告在儲存後會被更新)。"""
+        if self.run_metrics is None:
+            return
+        summary = self.run_metrics.format_summary()
+        if self.skipped_count:
+            summary += f"\n略過 {self.skipped_count} 個未變更且已完整的檔案"
+        try:
+            self.run_metrics.write_report(self.run_report_path, mode=self.mode, files=len(self.files),
+                                          unchanged_skipped=self.skipped_count, images=self.run_image_count)
+            summary += f"\n報告：{self.run_report_path}"
+        except OSError as e:
+            summary += f"\n報告輸出失敗：{e}"
+        self.metrics_label.setText(summary)
+        self.metrics_label.setVisible(True)
+
     def go_back(self):
         # 詢問使用者是否確定要放棄變更
-        if any(len(items) > 0 for items in self.all_list_items.values()):
+        if self.tabs_with_items:
             reply = QMessageBox.question(self, '確認取消', 
                                          '您有尚未儲存的修改，確定要放棄並返回首頁嗎？',
                                          QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, 
                                          QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.No:
                 return
-                
+            self._discard_journaled_results()
+
+        self.stop_parsing()
         self.back_to_home.emit()
 
+    def stop_parsing(self):
+        """
+        中斷背景解析並斷開訊號，離開後不再填入分頁或輸出報告。
+        不在這裡等待執行緒結束 (目前的檔案解析完就會停止)，保留參照由 reset_state() 等待。
+        """
+        if not (self.parse_worker and self.parse_worker.isRunning()):
+            return
+        for signal in (self.parse_worker.files_selected, self.parse_worker.file_parsed, self.parse_worker.finished):
+            signal.disconnect()
+        self.parse_worker.requestInterruption()
+        self.progress_bar.setVisible(False)
+
+    def _discard_journaled_results(self):
+        """使用者放棄修改時，一併移除這些檔案在結果日誌中的紀錄，下次自動生成不再沿用被放棄的結果。"""
+        if self.mode != "auto" or not self.result_journal:
+            return
+        try:
+            self.result_journal.discard_files(self.files)
+        except OSError as e: # 即將返回首頁，錯誤訊息改以對話框顯示
+            QMessageBox.warning(self, "結果日誌更新失敗", f"無法移除已放棄的結果: {e}")
+
     def reset_state(self):
+        self.thumbnail_loader.cancel_pending()
+        # QTabWidget.clear() 不會刪除分頁本身，需自行釋放 (連同其中的 model)
+        for i in range(self.tab_widget.count()):
+            self.tab_widget.widget(i).deleteLater()
         self.tab_widget.clear()
         self.files = []
-        self.html_soups.clear()
-        self.all_list_items.clear()
+        self.list_models.clear()
+        self.file_tabs.clear()
+        self.tabs_with_items.clear()
         self.confirm_all_btn.setEnabled(False)
         self.progress_bar.setVisible(False)
         self.error_label.setVisible(False)
         self.error_label.setText("")
+        self.metrics_label.setVisible(False)
         # 確保 worker 停止
+        if self.parse_worker and self.parse_worker.isRunning():
+            self.parse_worker.requestInterruption()
+            self.parse_worker.wait()
+        self.parse_worker = None
+        if self.save_worker and self.save_worker.isRunning():
+            self.save_worker.wait() # 不中斷寫入，等待進行中的儲存完成
+        self.save_worker = None
         if self.worker and self.worker.isRunning():
-            self.worker.terminate()
+            # 協作式取消：不強制終止執行緒，連線、快取與結果日誌都能正常收尾
+            self.worker.cancel()
             self.worker.wait()
+        self.worker = None
 
 
 # --- 主視窗 ---
@@ -801,9 +1324,16 @@ class MainWindow(QMainWindow):
         self.stacked_widget = QStackedWidget()
         self.main_layout.addWidget(self.stacked_widget)
 
+        # 掃描索引供編輯頁的背景解析執行緒略過未變更的檔案，並記錄解析結果
+        try:
+            self.scan_index = HtmlScanIndex()
+        except Exception as e: # 索引無法開啟時每次都重新解析全部檔案
+            QMessageBox.warning(self, "掃描索引無法開啟", f"將不會略過未變更的檔案，每次都重新解析全部檔案。\n{e}")
+            self.scan_index = None
+
         # 創建頁面
         self.home_page = HomePageWidget()
-        self.edit_page = EditPageWidget()
+        self.edit_page = EditPageWidget(self.scan_index)
 
         # 添加頁面到堆疊窗口
         self.stacked_widget.addWidget(self.home_page)
@@ -811,6 +1341,7 @@ class MainWindow(QMainWindow):
 
         # 連接信號
         self.home_page.confirm_btn.clicked.connect(self.go_to_edit_page)
+        self.home_page.cache_btn.clicked.connect(self.show_cache_manager)
         self.edit_page.back_to_home.connect(self.go_to_home_page)
 
     def go_to_edit_page(self):
@@ -827,6 +1358,19 @@ class MainWindow(QMainWindow):
         self.home_page.reset_state()
         self.stacked_widget.setCurrentWidget(self.home_page)
 
+    def show_cache_manager(self):
+        dialog = CacheManagerDialog(self.edit_page.thumbnail_loader.disk_cache, self.scan_index,
+                                    self.edit_page.result_journal, self)
+        dialog.exec()
+
+    def closeEvent(self, event):
+        # 先停止進行中的 worker，再關閉整個程式共用的 API 連線
+        self.edit_page.reset_state()
+        client_manager.close()
+        if self.scan_index:
+            self.scan_index.close()
+        super().closeEvent(event)
+
     def create_icon(self):
         # 創建一個簡單的程式圖標
         pixmap = QPixmap(64, 64)
@@ -834,7 +1378,7 @@ class MainWindow(QMainWindow):
         
         # 簡單畫一個 'A+'
         img = QImage(pixmap.toImage())
-        from PyQt6.QtGui import QPainter, QFont, QColor
+        from PyQt6.QtGui import QFont
         
         p = QPainter(img)
         p.setRenderHint(QPainter.RenderHint.Antialiasing)
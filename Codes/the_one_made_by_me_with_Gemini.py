@@ -1,15 +1,18 @@
 import sys
 import os
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QFrame, QFileDialog, QMessageBox, QSpacerItem, QSizePolicy,
-    QScrollArea, QLineEdit, QListWidget, QListWidgetItem, QDialog, QDialogButtonBox
+    QScrollArea, QLineEdit, QListView, QAbstractItemView, QStyledItemDelegate, QStyle, QDialog, QDialogButtonBox
+)
+from PyQt6.QtCore import (
+    Qt, QMimeData, QUrl, QSize, QRect, QPoint, QEvent, QBuffer, QIODevice, QAbstractListModel, QModelIndex, pyqtSignal
 )
-from PyQt6.QtCore import Qt, QMimeData, QUrl, QSize
 from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QPalette, QColor, QFont, QPixmap, QImage, QPainter
-from bs4 import BeautifulSoup
-from PIL import Image as PilImage # 避免與 PyQt6.QtGui.QImage 衝突
 from io import BytesIO
+# Pillow 載入較慢，延後到第一次載入圖片時才匯入，讓視窗能更快顯示；HTML 由 alt_engine 串流掃描與寫回，不需 BeautifulSoup
+from alt_engine import ThumbnailDiskCache, scan_html_file, scan_img_tags, write_alt_texts # 與 AI-Studio 版本共用縮圖快取與 HTML 掃描
 
 
 # 定義顏色調色盤
@@ -24,6 +27,12 @@ SELECTED_BUTTON_BORDER_COLOR = "#00FF00" # 選取按鈕的邊框色 (亮綠色)
 DISABLED_COLOR_BACKGROUND = "#A0A0A0" # 禁用按鈕的背景色
 DISABLED_COLOR_TEXT = "#E0E0E0"    # 禁用按鈕的文字色
 
+# 手動頁面圖片列表
+MANUAL_THUMBNAIL_SIZE = 60 # 縮圖邊長
+MANUAL_THUMBNAIL_CACHE_SIZE = 300 # 記憶體中保留的縮圖數量 (只保留最近繪製過的列)
+MANUAL_ALT_INPUT_SIZE = QSize(250, 30) # Alt 輸入框大小
+MANUAL_ITEM_PADDING = 10 # 列表項目的內邊距
+
 
 class ImagePreviewDialog(QDialog):
     """
@@ -93,6 +102,8 @@ class ImagePreviewDialog(QDialog):
         print(f"DEBUG: Attempting to load preview image from: {absolute_image_path}")
 
         try:
+            from PIL import Image as PilImage # 避免與 PyQt6.QtGui.QImage 衝突
+
             # 嘗試使用 Pillow 載入圖片，可以處理更多格式和潛在的問題
             pil_image = PilImage.open(absolute_image_path)
             
@@ -128,11 +139,13 @@ class HtmlProcessor:
     """
     HTML 檔案處理類別
     負責 HTML 檔案的讀取、解析、檢查和修改。
+    載入時只串流掃描並記錄 <img> 標籤，不在記憶體中保留檔案內容或整棵文件樹。
     """
     def __init__(self):
         self.html_file_path = None
-        self.html_content = None
-        self.soup = None # BeautifulSoup 物件
+        self.encoding = None # 載入時判斷出的編碼，寫回時沿用
+        self.img_tags = None # 文件中所有 <img> 標籤 (alt_engine.ImgTag)
+        self._images_to_process = None # get_images_to_process() 的結果，載入或儲存檔案時才重新計算
 
     def load_html_file(self, file_path):
         """
@@ -140,23 +153,17 @@ class HtmlProcessor:
         """
         if not file_path.lower().endswith(('.html', '.htm')):
             return False, "錯誤：請上傳有效的 HTML 檔案 (.html 或 .htm)。"
-        
-        # 嘗試以多種編碼讀取
-        encodings = ['utf-8', 'big5', 'gbk', 'latin-1']
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    self.html_content = f.read()
-                self.html_file_path = file_path
-                self.soup = BeautifulSoup(self.html_content, 'html.parser') # 解析 HTML
-                print(f"DEBUG: HTML file loaded with {encoding} encoding.")
-                return True, f"檔案載入成功 (使用 {encoding} 編碼)。"
-            except UnicodeDecodeError:
-                continue # 嘗試下一個編碼
-            except Exception as e:
-                return False, f"載入檔案時發生錯誤：{e}"
-        
-        return False, "載入檔案失敗：無法識別檔案編碼或檔案內容損壞。"
+
+        # 只讀取一次檔案：依 BOM、<meta charset> 與內容判斷編碼，同時串流掃描 <img>
+        try:
+            self.img_tags, encoding = scan_html_file(file_path)
+        except Exception as e:
+            return False, f"載入檔案時發生錯誤：{e}"
+        self.html_file_path = file_path
+        self.encoding = encoding
+        self._images_to_process = None
+        print(f"DEBUG: HTML file loaded with {encoding} encoding.")
+        return True, f"檔案載入成功 (使用 {encoding} 編碼)。"
 
 
     def clear_file(self):
@@ -164,8 +171,9 @@ class HtmlProcessor:
         清除已載入的檔案資訊。
         """
         self.html_file_path = None
-        self.html_content = None
-        self.soup = None
+        self.encoding = None
+        self.img_tags = None
+        self._images_to_process = None
 
     def get_images_to_process(self):
         """
@@ -175,17 +183,20 @@ class HtmlProcessor:
         2. alt 屬性值為空字串或只有空格的 <img> 元素 (簡易判斷不符合規範)。
         返回一個列表，每個元素是一個字典：
         {
-            'element': <img> 標籤物件,
+            'element': 掃描時記錄的 <img> 標籤 (alt_engine.ImgTag),
             'src': 圖片路徑,
             'current_alt': 當前 alt 屬性值 (如果有的話),
             'needs_alt': True/False (是否需要新增/修改 alt)
         }
+        結果會快取到下次載入或儲存檔案為止，重複呼叫不會再次掃描整份文件。
         """
-        if not self.soup:
+        if self.img_tags is None:
             return []
+        if self._images_to_process is not None:
+            return self._images_to_process
 
         images_to_process = []
-        for img_tag in self.soup.find_all('img'):
+        for img_tag in self.img_tags:
             src = img_tag.get('src')
             alt = img_tag.get('alt')
             
@@ -207,6 +218,7 @@ class HtmlProcessor:
                     'current_alt': alt if alt is not None else "", # 如果為 None 則給空字串
                     'needs_alt': True
                 })
+        self._images_to_process = images_to_process
         return images_to_process
 
     def save_html_with_new_alts(self, updated_images_data):
@@ -214,33 +226,202 @@ class HtmlProcessor:
         將新的 alt 屬性寫回 HTML 內容並保存檔案。
         updated_images_data 是一個列表，每個元素是一個字典：
         {
-            'element': 原始的 <img> 標籤物件,
+            'element': 掃描時記錄的 <img> 標籤 (alt_engine.ImgTag),
             'new_alt': 新的 alt 文本
         }
         """
-        if not self.soup or not self.html_file_path:
+        if self.img_tags is None or not self.html_file_path:
             return False, "沒有載入的 HTML 檔案。"
 
         try:
-            for img_data in updated_images_data:
-                original_img_element = img_data['element']
-                new_alt_text = img_data['new_alt']
-                
-                # 直接在傳入的 BeautifulSoup 元素上更新 alt 屬性
-                # BeautifulSoup 的 Tag 對象是可變的，直接修改即可
-                original_img_element['alt'] = new_alt_text
-            
-            # 將修改後的 BeautifulSoup 物件寫回檔案
-            # 為了兼容性，建議在寫入時指定 encoding
-            # 如果原始檔案有 BOM，BeautifulSoup 會保留
-            with open(self.html_file_path, 'w', encoding='utf-8') as f:
-                f.write(str(self.soup))
+            alt_texts = [(img_data['element'], img_data['new_alt']) for img_data in updated_images_data]
+            # 寫入時才暫時解析文件並依 <img> 順序修改 alt，以載入時的編碼寫回
+            write_alt_texts(self.html_file_path, alt_texts, encoding=self.encoding)
+
+            # alt 已改變，重新掃描取得最新的 <img> 標籤
+            self.img_tags = scan_img_tags(self.html_file_path, encoding=self.encoding)
+            self._images_to_process = None
             
             return True, "Alt 敘述已成功寫入 HTML 檔案。"
         except Exception as e:
             return False, f"保存檔案時發生錯誤：{e}"
 
 
+class ManualImageListModel(QAbstractListModel):
+    """
+    手動生成頁面的圖片列表資料。
+    列表只會向 Model 查詢畫面上看得到的列，縮圖也在該列第一次被繪製時才載入，
+    頁面中有數千張圖片時不必一次建立數千個 widget 或解碼所有圖片。
+    """
+    modified_changed = pyqtSignal(bool) # 「是否有任何 Alt 被修改」改變時才送出，而非每次輸入
+    SrcRole = Qt.ItemDataRole.UserRole + 1 # 圖片原始路徑
+
+    def __init__(self, thumbnail_provider, parent=None):
+        super().__init__(parent)
+        self.thumbnail_provider = thumbnail_provider # 傳入圖片路徑、回傳 QPixmap 縮圖的函式
+        self.images = [] # [{'element', 'src', 'original_alt', 'alt'}]
+        self.modified_rows = set() # Alt 與原始值不同的列，每次輸入只需 O(1) 更新
+        self._thumbnails = OrderedDict() # {src: QPixmap}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.images)
+
+    def flags(self, index):
+        return super().flags(index) | Qt.ItemFlag.ItemIsEditable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        img_data = self.images[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return img_data['alt']
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.thumbnail(img_data['src'])
+        if role == self.SrcRole:
+            return img_data['src']
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        img_data = self.images[index.row()]
+        if img_data['alt'] != value:
+            img_data['alt'] = value
+            self.dataChanged.emit(index, index, [role])
+            was_modified = bool(self.modified_rows)
+            if value.strip() != img_data['original_alt'].strip():
+                self.modified_rows.add(index.row())
+            else:
+                self.modified_rows.discard(index.row())
+            if bool(self.modified_rows) != was_modified:
+                self.modified_changed.emit(bool(self.modified_rows))
+        return True
+
+    def thumbnail(self, src):
+        """取得縮圖，超過上限時淘汰最久沒有被繪製的縮圖。"""
+        pixmap = self._thumbnails.get(src)
+        if pixmap is not None:
+            self._thumbnails.move_to_end(src)
+            return pixmap
+        pixmap = self.thumbnail_provider(src)
+        self._thumbnails[src] = pixmap
+        if len(self._thumbnails) > MANUAL_THUMBNAIL_CACHE_SIZE:
+            self._thumbnails.popitem(last=False)
+        return pixmap
+
+    def set_images(self, images_to_process):
+        """images_to_process 為 HtmlProcessor.get_images_to_process() 的結果。"""
+        self.beginResetModel()
+        self.images = [{
+            'element': img_data['element'],
+            'src': img_data['src'],
+            'original_alt': img_data['current_alt'], # 儲存原始 alt 值
+            'alt': img_data['current_alt'],
+        } for img_data in images_to_process]
+        self.modified_rows.clear()
+        self._thumbnails.clear()
+        self.endResetModel()
+
+
+class ManualImageItemDelegate(QStyledItemDelegate):
+    """
+    以繪製取代每列一個 widget：縮圖、圖片路徑與 Alt 輸入框的外觀。
+    只有使用者正在編輯的那一列才會建立真正的 QLineEdit。
+    """
+    preview_requested = pyqtSignal(str) # 點擊縮圖時送出圖片原始路徑
+
+    ALT_INPUT_STYLE = f"""
+        QLineEdit {{
+            border: 1px solid #ccc;
+            border-radius: 3px;
+            padding: 5px;
+            background-color: #f9f9f9;
+            color: {TEXT_COLOR_DARK}; /* 明確設定文字顏色為深色 (修正點2) */
+        }}
+    """
+
+    def sizeHint(self, option, index):
+        return QSize(max(option.rect.width(), 400), MANUAL_THUMBNAIL_SIZE + MANUAL_ITEM_PADDING * 3)
+
+    def _thumbnail_rect(self, item_rect):
+        top = item_rect.top() + (item_rect.height() - MANUAL_THUMBNAIL_SIZE) // 2
+        return QRect(item_rect.left() + MANUAL_ITEM_PADDING * 2, top, MANUAL_THUMBNAIL_SIZE, MANUAL_THUMBNAIL_SIZE)
+
+    def _input_rect(self, item_rect):
+        left = item_rect.right() - MANUAL_ITEM_PADDING * 2 - MANUAL_ALT_INPUT_SIZE.width()
+        top = item_rect.top() + (item_rect.height() - MANUAL_ALT_INPUT_SIZE.height()) // 2
+        return QRect(QPoint(left, top), MANUAL_ALT_INPUT_SIZE)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        if option.state & QStyle.StateFlag.State_MouseOver:
+            painter.fillRect(option.rect, QColor("#f0f0f0"))
+        painter.setPen(QColor("#eee"))
+        painter.drawLine(option.rect.bottomLeft(), option.rect.bottomRight())
+
+        # 圖片預覽
+        thumbnail_rect = self._thumbnail_rect(option.rect)
+        pixmap = index.data(Qt.ItemDataRole.DecorationRole)
+        if pixmap is not None and not pixmap.isNull():
+            x = thumbnail_rect.left() + (thumbnail_rect.width() - pixmap.width()) // 2
+            y = thumbnail_rect.top() + (thumbnail_rect.height() - pixmap.height()) // 2
+            painter.drawPixmap(x, y, pixmap)
+
+        # 圖片原始路徑
+        input_rect = self._input_rect(option.rect)
+        path_rect = QRect(thumbnail_rect.right() + MANUAL_ITEM_PADDING, option.rect.top(),
+                          input_rect.left() - thumbnail_rect.right() - MANUAL_ITEM_PADDING * 2, option.rect.height())
+        painter.setFont(QFont("微軟正黑體", 14)) # 字體放大至 14px (修正點3)
+        painter.setPen(QColor("#555")) # 深灰色
+        path_text = painter.fontMetrics().elidedText(f"路徑: {index.data(ManualImageListModel.SrcRole)}",
+                                                     Qt.TextElideMode.ElideMiddle, path_rect.width())
+        painter.drawText(path_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, path_text)
+
+        # Alt 輸入欄位外觀
+        painter.setFont(option.font)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QColor("#ccc"))
+        painter.setBrush(QColor("#f9f9f9"))
+        painter.drawRoundedRect(input_rect.adjusted(0, 0, -1, -1), 3, 3)
+        text_rect = input_rect.adjusted(6, 0, -6, 0)
+        alt_text = index.data(Qt.ItemDataRole.DisplayRole)
+        if alt_text:
+            painter.setPen(QColor(TEXT_COLOR_DARK))
+        else:
+            alt_text = "請輸入 Alt 敘述"
+            painter.setPen(QColor("#999"))
+        alt_text = painter.fontMetrics().elidedText(alt_text, Qt.TextElideMode.ElideRight, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, alt_text)
+        painter.restore()
+
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setPlaceholderText("請輸入 Alt 敘述")
+        editor.setStyleSheet(self.ALT_INPUT_STYLE)
+        # 每打一個字就寫回 Model，讓「確定並儲存」按鈕即時更新
+        editor.textChanged.connect(lambda: self.commitData.emit(editor))
+        return editor
+
+    def setEditorData(self, editor, index):
+        alt_text = index.data(Qt.ItemDataRole.EditRole)
+        if editor.text() != alt_text: # 避免輸入中游標被重設
+            editor.setText(alt_text)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.text(), Qt.ItemDataRole.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(self._input_rect(option.rect))
+
+    def editorEvent(self, event, model, option, index):
+        # 點擊圖片放大
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            if self._thumbnail_rect(option.rect).contains(event.position().toPoint()):
+                self.preview_requested.emit(index.data(ManualImageListModel.SrcRole))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+
 class AltGeneratorApp(QWidget):
     """
     主應用程式視窗類別
@@ -256,6 +437,10 @@ class AltGeneratorApp(QWidget):
 
         self.current_page = None # 記錄當前顯示的頁面
         self.is_manual_alt_modified = False # 新增：追蹤手動修改頁面是否有變動
+        try:
+            self.thumbnail_disk_cache = ThumbnailDiskCache() # 縮圖磁碟快取，重新開啟同一網站時不必再解碼原圖
+        except OSError:
+            self.thumbnail_disk_cache = None
         self.init_ui()
 
     def init_ui(self):
@@ -429,23 +614,37 @@ class AltGeneratorApp(QWidget):
         
         manual_layout.addWidget(QLabel("<h2>手動生成 Alt 敘述</h2>", alignment=Qt.AlignmentFlag.AlignCenter))
         
-        # 圖片列表區
-        self.manual_image_list_widget = QListWidget()
-        self.manual_image_list_widget.setStyleSheet("""
-            QListWidget {
+        # 圖片列表區 (Model / View，只有看得到的列會被繪製、載入縮圖)
+        self.manual_image_model = ManualImageListModel(self.load_image_thumbnail, self)
+        self.manual_image_model.modified_changed.connect(self.check_manual_alt_modification)
+        self.manual_image_delegate = ManualImageItemDelegate(self)
+        self.manual_image_delegate.preview_requested.connect(self.show_image_preview)
+
+        self.manual_image_list_view = QListView()
+        self.manual_image_list_view.setModel(self.manual_image_model)
+        self.manual_image_list_view.setItemDelegate(self.manual_image_delegate)
+        self.manual_image_list_view.setUniformItemSizes(True) # 所有列同高，捲動時不必逐列計算大小
+        self.manual_image_list_view.setMouseTracking(True) # 滑鼠移過時的底色
+        self.manual_image_list_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.manual_image_list_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.manual_image_list_view.setEditTriggers(
+            QAbstractItemView.EditTrigger.CurrentChanged | QAbstractItemView.EditTrigger.SelectedClicked
+            | QAbstractItemView.EditTrigger.EditKeyPressed | QAbstractItemView.EditTrigger.AnyKeyPressed
+        )
+        self.manual_image_list_view.setStyleSheet("""
+            QListView {
                 border: 1px solid #ccc;
                 border-radius: 5px;
                 background-color: white;
             }
-            QListWidget::item {
-                padding: 10px;
-                border-bottom: 1px solid #eee;
-            }
-            QListWidget::item:hover {
-                background-color: #f0f0f0;
-            }
         """)
-        manual_layout.addWidget(self.manual_image_list_widget)
+        manual_layout.addWidget(self.manual_image_list_view)
+
+        # 沒有需要處理的圖片時的提示
+        self.manual_empty_label = QLabel("此 HTML 檔案中沒有需要處理的圖片元素。", alignment=Qt.AlignmentFlag.AlignCenter)
+        self.manual_empty_label.setContentsMargins(0, 50, 0, 50) # 增加一些上下間距
+        self.manual_empty_label.hide()
+        manual_layout.addWidget(self.manual_empty_label)
 
         # 頁尾按鈕區
         bottom_layout = QHBoxLayout()
@@ -688,7 +887,14 @@ class AltGeneratorApp(QWidget):
             abs_image_path = os.path.normpath(os.path.join(html_dir, image_path))
         
         print(f"DEBUG: Attempting to load thumbnail from: {abs_image_path}") # 加強調試輸出
+        cache_size_key = f"{size.width()}x{size.height()}"
+        if self.thumbnail_disk_cache:
+            cached = self.thumbnail_disk_cache.get(abs_image_path, cache_size_key)
+            if cached is not None and pixmap.loadFromData(cached):
+                return pixmap
         try:
+            from PIL import Image as PilImage # 避免與 PyQt6.QtGui.QImage 衝突
+
             # 嘗試使用 Pillow 載入圖片，可以處理更多格式和潛在的問題
             pil_image = PilImage.open(abs_image_path)
             
@@ -709,7 +915,13 @@ class AltGeneratorApp(QWidget):
             qimage = QImage(pil_image.tobytes(), pil_image.width, pil_image.height, bytes_per_line, qimage_format)
             
             pixmap = QPixmap.fromImage(qimage)
-            return pixmap.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            pixmap = pixmap.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            if self.thumbnail_disk_cache:
+                buffer = QBuffer()
+                buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+                pixmap.save(buffer, "PNG")
+                self.thumbnail_disk_cache.put(abs_image_path, cache_size_key, bytes(buffer.data()))
+            return pixmap
 
         except Exception as e:
             print(f"ERROR: Thumbnail load failed for {abs_image_path}: {e}") # 詳細錯誤信息
@@ -728,88 +940,18 @@ class AltGeneratorApp(QWidget):
         """
         填充手動生成頁面的圖片列表。
         """
-        self.manual_image_list_widget.clear() # 清空現有列表
         images_to_process = self.html_processor.get_images_to_process()
+        self.manual_image_model.set_images(images_to_process)
 
-        if not images_to_process:
-            item = QListWidgetItem(self.manual_image_list_widget)
-            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsSelectable) # 不可選中
-            # 自定義一個簡單的提示 widget
-            no_image_widget = QWidget()
-            no_image_layout = QVBoxLayout(no_image_widget)
-            no_image_layout.addWidget(QLabel("此 HTML 檔案中沒有需要處理的圖片元素。", alignment=Qt.AlignmentFlag.AlignCenter))
-            no_image_layout.setContentsMargins(0, 50, 0, 50) # 增加一些上下間距
-            self.manual_image_list_widget.setItemWidget(item, no_image_widget)
-            item.setSizeHint(no_image_widget.sizeHint())
-            return
-
-        for img_data in images_to_process:
-            list_item = QListWidgetItem(self.manual_image_list_widget)
-            
-            item_widget = QWidget()
-            item_layout = QHBoxLayout(item_widget)
-            item_layout.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-            item_layout.setContentsMargins(10, 5, 10, 5) # 內部邊距增加左右
-
-            # 圖片預覽
-            img_label = QLabel()
-            thumbnail = self.load_image_thumbnail(img_data['src'])
-            img_label.setPixmap(thumbnail)
-            img_label.setFixedSize(60, 60) # 保持一致的縮圖大小
-            # 點擊圖片放大
-            img_label.mousePressEvent = lambda event, path=img_data['src']: self.show_image_preview(path)
-            
-            item_layout.addWidget(img_label)
-
-            # 圖片原始路徑
-            path_label = QLabel(f"路徑: {img_data['src']}")
-            path_label.setFont(QFont("微軟正黑體", 14)) # 字體放大至 14px (修正點3)
-            path_label.setStyleSheet("color: #555;") # 深灰色
-            item_layout.addWidget(path_label)
-
-            item_layout.addStretch(1) # 推開圖片路徑
-
-            # Alt 輸入欄位
-            alt_input = QLineEdit()
-            alt_input.setPlaceholderText("請輸入 Alt 敘述")
-            alt_input.setText(img_data['current_alt']) # 載入當前 alt
-            alt_input.setProperty("original_alt", img_data['current_alt']) # 儲存原始 alt 值
-            alt_input.setFixedSize(250, 30) # 固定輸入框大小
-            alt_input.setStyleSheet(f"""
-                QLineEdit {{
-                    border: 1px solid #ccc;
-                    border-radius: 3px;
-                    padding: 5px;
-                    background-color: #f9f9f9;
-                    color: {TEXT_COLOR_DARK}; /* 明確設定文字顏色為深色 (修正點2) */
-                }}
-            """)
-            # 連接 textChanged 信號來追蹤修改
-            alt_input.textChanged.connect(self.check_manual_alt_modification)
-            
-            # 將 alt_input 儲存到 list_item 的數據中，方便後續讀取
-            list_item.setData(Qt.ItemDataRole.UserRole, {'element': img_data['element'], 'alt_input_widget': alt_input})
-            item_layout.addWidget(alt_input)
-
-            self.manual_image_list_widget.setItemWidget(list_item, item_widget)
-            list_item.setSizeHint(item_widget.sizeHint()) # 根據 widget 調整 item 高度
+        has_images = bool(images_to_process)
+        self.manual_image_list_view.setVisible(has_images)
+        self.manual_empty_label.setVisible(not has_images)
 
     def check_manual_alt_modification(self):
         """
         檢查手動生成頁面中是否有任何 Alt 敘述被修改。
         """
-        modified = False
-        for i in range(self.manual_image_list_widget.count()):
-            list_item = self.manual_image_list_widget.item(i)
-            item_data = list_item.data(Qt.ItemDataRole.UserRole)
-            if item_data:
-                alt_input_widget = item_data['alt_input_widget']
-                current_text = alt_input_widget.text().strip()
-                original_text = alt_input_widget.property("original_alt").strip()
-                if current_text != original_text:
-                    modified = True
-                    break
-        self.is_manual_alt_modified = modified
+        self.is_manual_alt_modified = bool(self.manual_image_model.modified_rows)
         self.update_manual_confirm_button_state()
 
     def update_manual_confirm_button_state(self):
@@ -835,20 +977,11 @@ class AltGeneratorApp(QWidget):
         從手動生成頁面收集新的 Alt 敘述並保存到 HTML 檔案。
         """
         updated_images_data = []
-        # 遍歷所有列表項，即使它們是提示訊息 (但要跳過沒有數據的)
-        for i in range(self.manual_image_list_widget.count()):
-            list_item = self.manual_image_list_widget.item(i)
-            item_data = list_item.data(Qt.ItemDataRole.UserRole)
-            
-            if item_data: # 如果是有效數據項 (非提示訊息)
-                img_element = item_data['element']
-                alt_input_widget = item_data['alt_input_widget']
-                new_alt = alt_input_widget.text().strip()
-                
-                updated_images_data.append({
-                    'element': img_element,
-                    'new_alt': new_alt
-                })
+        for img_data in self.manual_image_model.images:
+            updated_images_data.append({
+                'element': img_data['element'],
+                'new_alt': img_data['alt'].strip()
+            })
 
         success, message = self.html_processor.save_html_with_new_alts(updated_images_data)
 